@@ -1,15 +1,44 @@
 import os
-import requests
-import feedparser
-from datetime import datetime
+import atexit
+import json
+import mimetypes
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from flask import Flask, render_template
-from requests.auth import HTTPBasicAuth
+from flask import Flask, Response, abort, render_template, request, send_file
+from markupsafe import Markup
+import breaker
+import data
+from assets import IMMUTABLE, Assets, accepted_encodings
+from breaker import POLL_FAST, upstream
+from config import ConfigWatcher
+from events import EventBus, diff_section, stream
+from history import DAY, HOUR, WINDOWS, HistoryStore
+from fetch import session_for
+from refresher import Refresher
+from shared import SharedSnapshot
+from render_cache import RenderCache, encode_page
+from inventory import Classifier, Device
+from jira import JiraIndex
+import metrics
+from metrics import timed
+from providers import collect_tiles, load_providers
+from mdm import iter_graph, iter_graph_partitions, iter_jamf_inventory
+from tokens import TokenCache, expires_at, expires_in
 
 # --- INITIALIZATION ---
 load_dotenv()  # Injects variables from .env into the environment
 app = Flask(__name__)
 
+# Hashed, pre-compressed CSS/JS/images from build_assets.py (see assets.py).
+assets = Assets()
+app.jinja_env.globals["asset"] = assets
+app.jinja_env.filters["asset_url"] = assets.url
+
 # ==========================================
 # SECRETS MANAGEMENT (FUTURE PROOFING)
 # ==========================================
@@ -35,97 +64,201 @@ def get_aws_secret(secret_name, region_name="us-east-1"):
 # ==========================================
 from data import (
     ADMIN_LINKS, RAW_TICKETS, ON_CALL_USER, MAINTENANCE_INFO, 
-    ATLASSIAN_TARGETS, GITHUB_WATCHLIST, INVENTORY_WATCHLIST, 
-    MS_RSS_TARGETS, 
+    INVENTORY_WATCHLIST, STATUS_PROVIDERS, 
     USE_JAMF, JAMF_URL, JAMF_USER, JAMF_PASS, 
-    USE_INTUNE, AZURE_TENANT_ID, AZURE_CLIENT_ID, AZURE_CLIENT_SECRET
+    USE_INTUNE, AZURE_TENANT_ID, AZURE_CLIENT_ID, AZURE_CLIENT_SECRET,
+    JIRA_DOMAIN, JIRA_EMAIL, JIRA_API_TOKEN, JIRA_JQL
 )
 
-# SERVICE_ORDER: Governs the vertical hierarchy of tiles in the grid.
-# Grouped by provider: GitHub/Atlassian -> AWS -> Microsoft.
-SERVICE_ORDER = [
-    "GitHub", "Atlassian", 
-    "AWS EC2", "AWS S3", "AWS Lambda", 
-    "Microsoft 365", "Microsoft Teams", "Azure Status"
-]
+# PROVIDERS: Status tiles built from data.STATUS_PROVIDERS (see providers.py).
+# SERVICE_ORDER: Governs the vertical hierarchy of tiles in the grid, which
+# follows the order of STATUS_PROVIDERS.
+def build_providers(configs):
+    """Providers with their logos pointed at the self-hosted copies (once built)."""
+    providers = load_providers(configs)
+    for provider in providers:
+        provider.logo = assets.url(provider.logo)
+    return providers
+
+PROVIDERS = build_providers(STATUS_PROVIDERS)
+SERVICE_ORDER = [p.name for p in PROVIDERS]
+
+# Toggle for Live Tickets (Requires JIRA_DOMAIN, JIRA_EMAIL and JIRA_API_TOKEN in .env)
+LIVE_JIRA = os.getenv("LIVE_JIRA", "False").lower() == "true" and bool(JIRA_EMAIL and JIRA_API_TOKEN)
+# Tickets shown in the sidebar (the newest updates).
+JIRA_SIDEBAR_SIZE = 25
+
+# HEALTH_DEADLINE: Overall budget (seconds) for one get_health_data() fan-out.
+# Providers that have not answered by then render as 'Status Unknown'.
+# HEALTH_WORKERS bounds how many upstream fetches run at once, however many
+# providers are configured.
+HEALTH_DEADLINE = 6
+HEALTH_WORKERS = int(os.getenv("HEALTH_WORKERS", 16))
+health_pool = ThreadPoolExecutor(max_workers=HEALTH_WORKERS, thread_name_prefix="health")
+
+# INVENTORY_DEADLINE: Budget (seconds) for one Jamf or Intune count. Throttled
+# pages are not retried past it; the last counts are served as stale instead.
+INVENTORY_DEADLINE = 120
+
+# SSE_MAX_CLIENTS: Concurrent /events streams allowed. Keep it below the
+# Waitress thread count (see dockerfile) so page views always get a thread.
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", 180))
+
+# REFRESH_INTERVALS: Seconds between background refreshes of each section.
+# Pages are always rendered from the last snapshot, never from upstream.
+REFRESH_INTERVALS = {
+    "services": POLL_FAST,  # Each upstream still polls on its own adaptive cadence
+    "inventory": 300,
+    "tickets": 60,
+    "on_call": 60,
+    "maintenance": 60,
+    "admin_links": 60,
+}
 
-# Toggle for Live Tickets (Requires valid Jira API token in .env)
-LIVE_JIRA = False 
+# HISTORY_DB: SQLite file holding status transitions and uptime rollups.
+# Keep it on a volume (see docker-compose.yml) so history survives restarts.
+HISTORY_DB = os.getenv("HISTORY_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "history.db"))
+# Seconds between history rollup/compaction passes (and /api/history refreshes).
+HISTORY_INTERVAL = 300
+
+# CONFIG_RELOAD: Watch data.py and apply edits without a restart (see config.py).
+CONFIG_RELOAD = os.getenv("CONFIG_RELOAD", "True").lower() == "true"
+
+# SHARED_SNAPSHOT: Optional SQLite file shared by every worker/replica on the
+# host. Only the lease holder polls upstreams; unset = each process polls.
+SHARED_SNAPSHOT = os.getenv("SHARED_SNAPSHOT")
+
+# SNAPSHOT_FILE: Last-known snapshot saved to disk and served straight after a
+# restart while the first loads run. Empty = disabled.
+SNAPSHOT_FILE = os.getenv("SNAPSHOT_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "snapshot.json"))
+
+# WARMUP: Wait at boot for every section to load (and render the page once)
+# before reporting ready. /readyz answers 503 until that is done, or until
+# WARMUP_TIMEOUT seconds have passed if an upstream hangs.
+WARMUP = os.getenv("WARMUP", "True").lower() == "true"
+WARMUP_TIMEOUT = 30
+
+# How often get_maintenance() re-evaluates the window against the clock.
+MAINTENANCE_CHECK = timedelta(seconds=60)
 
 # ==========================================
 # SECTION 1: HARDWARE & TICKETS
 # ==========================================
 
+# Issue index kept current with delta queries (see jira.py).
+jira_index = JiraIndex(JIRA_DOMAIN, JIRA_EMAIL, JIRA_API_TOKEN, JIRA_JQL)
+
+@timed("jira")
 def get_jira_tickets():
-    """Handles logic for live Jira tickets vs mock display."""
-    # Note: When LIVE_JIRA is True, this function should be updated 
-    # with the requests logic for JIRA_DOMAIN and JIRA_API_TOKEN.
-    return RAW_TICKETS
+    """
+    Handles logic for live Jira tickets vs mock display. Live mode syncs only
+    the issues changed since the last refresh; on failure the refresher
+    keeps serving the previous list.
+    """
+    if not LIVE_JIRA: return RAW_TICKETS
+    jira_index.sync()
+    return jira_index.tickets(JIRA_SIDEBAR_SIZE)
 
-def get_jamf_counts():
+def fetch_jamf_token():
+    """Requests a Jamf Pro bearer token (Standard Jamf Pro API flow)."""
+    resp = session_for(JAMF_URL).post(f"{JAMF_URL}/api/v1/auth/token", auth=(JAMF_USER, JAMF_PASS), timeout=3)
+    resp.raise_for_status()
+    body = resp.json()
+    return body['token'], expires_at(body.get('expires'))
+
+def fetch_graph_token():
+    """Requests a Graph token from Microsoft Identity Platform (Azure AD)."""
+    token_data = {
+        'grant_type': 'client_credentials', 
+        'client_id': AZURE_CLIENT_ID, 
+        'client_secret': AZURE_CLIENT_SECRET, 
+        'scope': 'https://graph.microsoft.com/.default'
+    }
+    resp = session_for("https://login.microsoftonline.com").post(f"https://login.microsoftonline.com/{AZURE_TENANT_ID}/oauth2/v2.0/token", data=token_data, timeout=3)
+    resp.raise_for_status()
+    body = resp.json()
+    return body['access_token'], expires_in(body.get('expires_in'))
+
+# Tokens are reused across refresh cycles until shortly before they expire.
+jamf_token = TokenCache("jamf", fetch_jamf_token)
+graph_token = TokenCache("graph", fetch_graph_token)
+
+# Watchlist match rules compiled once per source platform.
+jamf_classifier = Classifier(INVENTORY_WATCHLIST, "jamf")
+intune_classifier = Classifier(INVENTORY_WATCHLIST, "intune")
+
+def jamf_device(c):
+    """Normalises a Jamf Pro inventory record for the classifier."""
+    hw = c.get('hardware') or {}
+    ram_mb = hw.get('totalRamMegabytes')
+    return Device(hw.get('model') or '', round(ram_mb / 1024, 1) if ram_mb else None, None)
+
+def intune_device(d):
+    """Normalises an Intune managedDevice (byte-to-GB variance rounded off)."""
+    ram = int(d.get('totalPhysicalMemoryInBytes') or 0)
+    storage = int(d.get('totalStorageSpaceInBytes') or 0)
+    return Device(d.get('model') or '', round(ram / (1024**3), 1), round(storage / (1000**3), 1) if storage else None)
+
+@timed("jamf")
+def count_jamf():
     """
-    Retrieves unassigned Mac counts via Jamf Pro.
-    Uses Advanced Search ID 5 to fetch all model data in a single request.
+    Retrieves unassigned Mac counts via the paginated Jamf Pro inventory API.
+    Model filtering runs server-side; pages are streamed and counted on the fly.
     """
-    counts = {"MacBook Air 15\"": 0, "MacBook M4 Pro 16\"": 0}
-    if not USE_JAMF: return counts
+    # Step 1: Page through watched models only (RSQL filter on the model name)
+    params = [("section", "HARDWARE"), ("section", "USER_AND_LOCATION")]
+    prefixes = jamf_classifier.server_prefixes()
+    if prefixes:
+        params.append(("filter", " or ".join(f'hardware.model=="{p}*"' for p in prefixes)))
+    computers = iter_jamf_inventory(jamf_token, JAMF_URL, params, deadline=time.monotonic() + INVENTORY_DEADLINE)
     
-    try:
-        # Step 1: Request Bearer Token for Auth (Standard Jamf Pro API flow)
-        auth_resp = requests.post(f"{JAMF_URL}/api/v1/auth/token", auth=(JAMF_USER, JAMF_PASS), timeout=3)
-        token = auth_resp.json()['token']
-        headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-        
-        # Step 2: Query Search ID 5 (Configured for 'Unassigned Macs')
-        # This is significantly faster than querying individual computer IDs.
-        url = f"{JAMF_URL}/JSSResource/advancedcomputersearches/id/5"
-        resp = requests.get(url, headers=headers, timeout=5)
-        computers = resp.json().get('advanced_computer_search', {}).get('computers', [])
-        
-        # Step 3: Increment counts based on model strings
-        for c in computers:
-            model = c.get('Model', '')
-            if "Air" in model and "15" in model: counts["MacBook Air 15\""] += 1
-            elif "Pro" in model and "16" in model: counts["MacBook M4 Pro 16\""] += 1
-    except Exception as e:
-        print(f"Jamf Error: {e}")
-    return counts
+    # Step 2: Classify unassigned machines (no username) against the watchlist rules
+    return jamf_classifier.count(
+        jamf_device(c) for c in computers if not (c.get('userAndLocation') or {}).get('username')
+    )
 
-def get_intune_counts():
+@timed("intune")
+def count_intune():
     """
     Retrieves unassigned PC counts via MS Graph (Intune).
-    Includes RAM Binning to differentiate 16GB vs 48GB hardware models.
+    Follows @odata.nextLink across every page, one pager per model prefix,
+    and bins RAM/storage through the watchlist rules.
     """
-    counts = {"HP G11 (16GB RAM)": 0, "HP G11 (48GB RAM)": 0}
-    if not USE_INTUNE: return counts
-    
+    endpoint = "https://graph.microsoft.com/v1.0/deviceManagement/managedDevices"
+    select = "$select=model,totalPhysicalMemoryInBytes,totalStorageSpaceInBytes&$top=999"
+    unfiltered = f"{endpoint}?$filter=userId eq null&{select}"
+
+    # Query Managed Devices (userId eq null = unassigned), filtered by model
+    prefixes = intune_classifier.server_prefixes()
+    urls = [f"{endpoint}?$filter=userId eq null and startswith(model,'{p}')&{select}" for p in prefixes or []]
+    deadline = time.monotonic() + INVENTORY_DEADLINE
     try:
-        # Step 1: Get Token from Microsoft Identity Platform (Azure AD)
-        token_data = {
-            'grant_type': 'client_credentials', 
-            'client_id': AZURE_CLIENT_ID, 
-            'client_secret': AZURE_CLIENT_SECRET, 
-            'scope': 'https://graph.microsoft.com/.default'
-        }
-        token_resp = requests.post(f"https://login.microsoftonline.com/{AZURE_TENANT_ID}/oauth2/v2.0/token", data=token_data, timeout=3)
-        token = token_resp.json().get("access_token")
-        
-        # Step 2: Query Managed Devices (userId eq null = unassigned)
-        headers = {'Authorization': f'Bearer {token}'}
-        endpoint = "https://graph.microsoft.com/v1.0/deviceManagement/managedDevices?$filter=userId eq null&$select=model,totalPhysicalMemoryInBytes"
-        resp = requests.get(endpoint, headers=headers, timeout=5)
-        
-        # Step 3: RAM Binning (Handling byte-to-GB variance)
-        for d in resp.json().get('value', []):
-            model = d.get('model', '').lower()
-            ram_gb = round(int(d.get('totalPhysicalMemoryInBytes', 0)) / (1024**3), 1)
-            if "g11" in model:
-                if 14.0 <= ram_gb <= 18.0: counts["HP G11 (16GB RAM)"] += 1
-                elif 44.0 <= ram_gb <= 52.0: counts["HP G11 (48GB RAM)"] += 1
+        devices = iter_graph_partitions(graph_token, urls, deadline=deadline) if urls else iter_graph(graph_token, unfiltered, deadline=deadline)
+        return intune_classifier.count(intune_device(d) for d in devices)
     except Exception as e:
-        print(f"Intune Error: {e}")
-    return counts
+        # Tenants that reject the model filter (HTTP 400) get the unfiltered query
+        if not urls or getattr(getattr(e, 'response', None), 'status_code', None) != 400: raise
+        return intune_classifier.count(intune_device(d) for d in iter_graph(graph_token, unfiltered, deadline=deadline))
+
+def get_jamf_counts():
+    """
+    Jamf counts behind a circuit breaker; failures serve the last counts as
+    stale, or unknown (None) counts if Jamf has never answered.
+    """
+    if not USE_JAMF: return dict.fromkeys(jamf_classifier.names, 0)
+    unknown = dict(dict.fromkeys(jamf_classifier.names), stale=True)
+    return upstream("jamf").call(count_jamf, default=unknown)
 
+def get_intune_counts():
+    """
+    Intune counts behind a circuit breaker; failures serve the last counts as
+    stale, or unknown (None) counts if Intune has never answered.
+    """
+    if not USE_INTUNE: return dict.fromkeys(intune_classifier.names, 0)
+    unknown = dict(dict.fromkeys(intune_classifier.names), stale=True)
+    return upstream("intune").call(count_intune, default=unknown)
+
+@timed("inventory")
 def get_inventory():
     """Collates API and Mock data for the Inventory grid UI."""
     processed_inv = []
@@ -136,15 +269,20 @@ def get_inventory():
         name = item.get('name')
         
         # Logic: If automation is ON, use API data. If OFF, use count from data.py.
-        if USE_JAMF and "MacBook" in name:
-            count = jamf_data.get(name, 0)
-        elif USE_INTUNE and "HP" in name:
-            count = intune_data.get(name, 0)
+        source = (item.get('match') or {}).get('source')
+        is_stale = False
+        if USE_JAMF and source == "jamf":
+            count, is_stale = jamf_data.get(name), jamf_data.get('stale', False)
+        elif USE_INTUNE and source == "intune":
+            count, is_stale = intune_data.get(name), intune_data.get('stale', False)
         else:
             count = item.get('count', 0) 
 
         # Visual status logic (Determines tile color and text)
-        if count == 0:
+        if count is None:
+            # The MDM has not answered yet: no count is better than a false 0
+            status_cls, status_txt = "unknown", "NO DATA"
+        elif count == 0:
             status_cls, status_txt = "critical", "OUT OF STOCK"
         elif count <= item.get('threshold', 5):
             status_cls, status_txt = "warning", "LOW STOCK"
@@ -152,7 +290,7 @@ def get_inventory():
             status_cls, status_txt = "good", "IN STOCK"
             
         processed_inv.append({
-            "name": name, "count": count, "class": status_cls, "text": status_txt
+            "name": name, "count": count, "class": status_cls, "text": status_txt, "stale": is_stale
         })
     return processed_inv
 
@@ -160,128 +298,429 @@ def get_inventory():
 # SECTION 2: HEALTH SCANNERS (RSS & API)
 # ==========================================
 
-def get_ms_health():
+@timed("services")
+def get_health_data():
     """
-    Parses Microsoft RSS feeds for Office 365, Teams, and Azure.
-    Maps generic RSS updates to 'All Systems Operational' or escalating alert levels.
+    Master function to aggregate all service statuses into the dashboard.
+    Every provider source is fetched concurrently on HEALTH_POOL; total
+    latency is bounded by HEALTH_DEADLINE rather than the sum of the
+    individual timeouts.
     """
-    results = []
-    for t in MS_RSS_TARGETS:
-        try:
-            feed = feedparser.parse(t['url'])
-            status_text = "All Systems Operational"
-            status_class = "good"
-            msgs = []
-
-            if feed.entries:
-                for entry in feed.entries[:2]:
-                    title = entry.title.lower()
-                    
-                    # Logic: Determine severity based on RSS title keywords
-                    if "resolved" not in title:
-                        if any(k in title for k in ["outage", "interruption", "major", "critical"]):
-                            status_text, status_class = "Major Outage", "critical"
-                        elif any(k in title for k in ["degradation", "issue", "investigating", "incident"]):
-                            if status_class != "critical": # Don't downgrade critical if already set
-                                status_text, status_class = "Service Degradation", "warning"
-                        
-                    msgs.append({
-                        "time": entry.published[17:22] if 'published' in entry else "--:--", 
-                        "text": entry.title
-                    })
-            
-            results.append({
-                "name": t['name'], "status": status_text, "class": status_class, 
-                "logo": t['logo'], "url": "https://status.office.com", 
-                "feed": msgs, "tag": "Global"
-            })
-        except: continue
-    return results
+    return collect_tiles(PROVIDERS, health_pool, time.monotonic() + HEALTH_DEADLINE)
 
-def get_health_data():
-    """Master function to aggregate all service statuses into the dashboard."""
-    results = []
-    
-    # --- GITHUB (JSON API) ---
-    try:
-        gh_data = requests.get("https://www.githubstatus.com/api/v2/summary.json", timeout=3).json()
-        status, css, tags = "All Systems Operational", "good", []
-        for comp in gh_data.get('components', []):
-            if comp['name'] in GITHUB_WATCHLIST and comp['status'] != 'operational':
-                tags.append(comp['name'])
-                if comp['status'] == 'major_outage': css, status = 'critical', "Major Outage"
-                elif comp['status'] == 'partial_outage' and css != 'critical': css, status = 'warning', "Partial Outage"
-        results.append({
-            "name": "GitHub", "status": status, "class": css, 
-            "logo": "https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png", 
-            "url": "https://www.githubstatus.com", "tag": tags if tags else "Global",
-            "feed": [{"time": i['created_at'][11:16], "text": i['name']} for i in gh_data.get('incidents', [])[:3]]
-        })
-    except: pass
-
-    # --- AWS (RSS Feeds) ---
-    aws_map = {"EC2": "ec2-us-east-1", "S3": "s3-us-east-1", "Lambda": "lambda-us-east-1"}
-    for name, slug in aws_map.items():
-        try:
-            feed = feedparser.parse(f"https://status.aws.amazon.com/rss/{slug}.rss")
-            st_txt, st_cls, msgs = "Operational", "good", []
-            if feed.entries:
-                for entry in feed.entries[:3]:
-                    if "resolved" not in entry.title.lower() and "informational" not in entry.title.lower():
-                        st_cls, st_txt = "warning", "Service Issue"
-                    msgs.append({"time": entry.published[17:22], "text": entry.title})
-            results.append({
-                "name": f"AWS {name}", "status": st_txt, "class": st_cls, 
-                "logo": "https://upload.wikimedia.org/wikipedia/commons/9/93/Amazon_Web_Services_Logo.svg", 
-                "url": "https://health.aws.amazon.com", "feed": msgs, "tag": "US-EAST-1"
-            })
-        except: continue
-
-    # --- ATLASSIAN (Statuspage APIs) ---
-    atl_status = {"status": "Operational", "class": "good", "tags": [], "feed": []}
-    for target in ATLASSIAN_TARGETS:
-        try:
-            data = requests.get(target["api"], timeout=3).json()
-            if data.get('incidents'):
-                inc = data['incidents'][0]
-                atl_status["status"] = "Active Incident"
-                atl_status["class"] = "critical" if inc['impact'] in ['major', 'critical'] else "warning"
-                atl_status["tags"].append(target["name"].upper())
-                atl_status["feed"].append({"time": datetime.now().strftime('%H:%M'), "text": f"[{target['name'].upper()}] {inc['name']}"})
-        except: continue
-    
-    results.append({
-        "name": "Atlassian", "status": atl_status["status"], "class": atl_status["class"], 
-        "logo": "https://cdn.worldvectorlogo.com/logos/atlassian.svg", "url": "https://status.atlassian.com", 
-        "feed": atl_status["feed"], "tag": atl_status["tags"]
-    })
+# ==========================================
+# SECTION 3: STATUS SNAPSHOT
+# ==========================================
+# Every section is refreshed in the background and published as one
+# immutable, versioned snapshot. Routes read it in O(1).
+
+# With SHARED_SNAPSHOT set, processes sharing that file elect one leader to
+# poll the upstreams; the others serve its snapshot (see shared.py).
+status = Refresher(shared=SharedSnapshot(SHARED_SNAPSHOT) if SHARED_SNAPSHOT else None, state_file=SNAPSHOT_FILE or None)
+status.register("services", get_health_data, REFRESH_INTERVALS["services"], default=[])
+status.register("inventory", get_inventory, REFRESH_INTERVALS["inventory"], default=[])
+status.register("tickets", get_jira_tickets, REFRESH_INTERVALS["tickets"], default=[])
+status.register("on_call", lambda: dict(ON_CALL_USER), REFRESH_INTERVALS["on_call"], prime=True)
+status.register("maintenance", lambda: dict(MAINTENANCE_INFO), REFRESH_INTERVALS["maintenance"], prime=True)
+status.register("admin_links", lambda: list(ADMIN_LINKS), REFRESH_INTERVALS["admin_links"], prime=True)
+
+# Status transitions are pushed to /events subscribers as small diffs.
+bus = EventBus()
+
+def publish_diffs(name, old, new):
+    for event, data in diff_section(name, old, new):
+        bus.publish(event, data)
+
+status.listeners.append(publish_diffs)
+
+# Provider results are kept as a transition log for uptime reporting.
+history = HistoryStore(HISTORY_DB)
+
+def record_history(name, old, new):
+    # Only the polling process writes history; followers see the same tiles.
+    if name != "services" or not status.leading: return
+    for tile in new or []:
+        history.record(tile['name'], tile['class'], tile.get('incident'))
+
+def get_history_summary():
+    """Rolls up completed hours, applies retention and returns 24h/7d/30d uptime."""
+    history.rollup()
+    history.compact()
+    return history.summary()
+
+status.listeners.append(record_history)
+status.register("history", get_history_summary, HISTORY_INTERVAL, default={})
+
+# Memo for get_maintenance(); 'last_check' = datetime.min forces a re-evaluation,
+# as does a new version of the maintenance section (e.g. after a config reload).
+maintenance_cache = {"last_check": datetime.min, "version": None, "data": None}
+
+def get_on_call():
+    """Returns the on-call engineer from the current snapshot."""
+    return status.get("on_call", {})
+
+def get_maintenance():
+    """
+    Returns the maintenance window with a live 'active'/'scheduled' status,
+    or None when nothing is upcoming (green state).
+    """
+    now = datetime.now()
+    section = status.snapshot().sections.get("maintenance")
+    version = section.version if section else None
+    if now - maintenance_cache['last_check'] < MAINTENANCE_CHECK and maintenance_cache['version'] == version:
+        return maintenance_cache['data']
 
-    # --- MICROSOFT (RSS Feeds) ---
-    results.extend(get_ms_health())
+    window = (section.data if section else None) or {}
+    start, end = window.get('start'), window.get('end')
+    result = None
+    if start and end and now <= end:
+        result = dict(window, status='active' if start <= now <= end else 'scheduled')
 
-    # --- FINAL SORTING BY SERVICE_ORDER ---
-    results.sort(key=lambda x: SERVICE_ORDER.index(x['name']) if x['name'] in SERVICE_ORDER else 99)
-    return results
+    maintenance_cache.update(last_check=now, version=version, data=result)
+    return result
 
 # ==========================================
-# SECTION 3: ROUTES
+# SECTION 4: ROUTES
 # ==========================================
 
-@app.route('/')
-def index():
-    """Constructs the dashboard payload and renders the template."""
+# Rendered fragments keyed by (section, section version), plus their encoded
+# /fragments bodies; whole pages keyed by snapshot version plus the header data.
+fragment_cache = RenderCache(size=16, name="fragment")
+page_cache = RenderCache(size=8, name="page")
+
+@app.before_request
+def track_in_flight():
+    metrics.IN_FLIGHT.inc()
+
+@app.teardown_request
+def untrack_in_flight(error=None):
+    metrics.IN_FLIGHT.dec()
+
+def render_fragment(snap, name):
+    """Renders templates/partials/<name>.html (given the section as `name`) once per section version."""
+    version = snap.sections[name].version if name in snap.sections else 0
+    return fragment_cache.get((name, version), lambda: Markup(render_template(f'partials/{name}.html', **{name: snap.get(name, [])})))
+
+def render_page(snap, on_call, maintenance, today):
+    """Assembles index.html from cached fragments."""
+    tickets = snap.get('tickets', [])
+    updated = snap.sections['services'].updated
     return render_template(
         'index.html', 
-        on_call=ON_CALL_USER, 
-        maintenance=MAINTENANCE_INFO,
-        services=get_health_data(),
-        admin_links=ADMIN_LINKS,
-        inventory=get_inventory(),
-        ticket_feed={"tickets": get_jira_tickets()},
-        date=datetime.now().strftime('%A, %b %d %Y'),
-        last_updated=datetime.now().strftime('%H:%M:%S')
+        status_etag=api_payload(snap)[0],
+        on_call=on_call, 
+        maintenance=maintenance,
+        fragments={
+            "admin_links": render_fragment(snap, 'admin_links'),
+            "inventory": render_fragment(snap, 'inventory'),
+            "services": render_fragment(snap, 'services'),
+            "tickets": render_fragment(snap, 'tickets'),
+        },
+        ticket_count=len(tickets),
+        date=today,
+        last_updated=datetime.fromtimestamp(updated).strftime('%H:%M:%S') if updated else "--:--:--"
     )
 
+@app.route('/')
+def index():
+    """
+    Serves the dashboard from the latest snapshot (no upstream I/O).
+    Repeat views of an unchanged snapshot reuse the pre-encoded page bytes.
+    """
+    started = time.perf_counter()
+    snap = status.snapshot()
+    on_call, maintenance = get_on_call(), get_maintenance()
+    today = datetime.now().strftime('%A, %b %d %Y')
+    key = (snap.version, today, json.dumps([on_call, maintenance], sort_keys=True, default=str))
+    page = page_cache.get(key, lambda: encode_page(render_page(snap, on_call, maintenance, today)))
+    resp = page_response(page, page.etag)
+    metrics.INDEX_RENDER.observe(time.perf_counter() - started)
+    return resp
+
+def page_response(page, etag):
+    """
+    HTML response carrying the pre-encoded variant the client accepts
+    (brotli, gzip or identity); each variant gets its own ETag.
+    """
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding'))
+    if page.brotli and 'br' in accepted:
+        body, encoding, suffix = page.brotli, "br", "-br"
+    elif 'gzip' in accepted:
+        body, encoding, suffix = page.gzipped, "gzip", "-gz"
+    else:
+        body, encoding, suffix = page.body, None, ""
+    resp = Response(body, mimetype="text/html")
+    if encoding: resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.set_etag(etag + suffix)
+    return resp.make_conditional(request)
+
+# Sections exposed by /api/status (maintenance is served with its live status).
+API_SECTIONS = ["services", "inventory", "tickets", "on_call", "maintenance", "admin_links"]
+
+# Encoded API bodies keyed by ETag; a new snapshot version invalidates them.
+api_cache = {}
+
+def api_payload(snap, section=None):
+    """
+    Returns (etag, compact JSON bytes) for the whole snapshot or one section.
+    The strong ETag is the snapshot (or section) version plus the maintenance
+    state, which changes with the clock rather than with a refresh. Versions
+    only move when data changes, so an unchanged poll is always a 304.
+    """
+    maintenance = get_maintenance()
+    maint_state = maintenance['status'] if maintenance else "none"
+    names = [section] if section else API_SECTIONS
+    version = snap.sections[section].version if section else snap.version
+    etag = f"{section or 'all'}-{version}-{maint_state}"
+
+    body = api_cache.get(etag)
+    if body is None:
+        sections = {}
+        for name in names:
+            entry = snap.sections.get(name)
+            data = maintenance if name == "maintenance" else (entry.data if entry else None)
+            sections[name] = {"version": entry.version if entry else 0, "updated": entry.updated if entry else 0, "data": data}
+        doc = sections[section] if section else {"version": snap.version, "sections": sections}
+        body = json.dumps(doc, separators=(",", ":"), default=str).encode()
+        if len(api_cache) > 4 * len(API_SECTIONS): api_cache.clear()
+        api_cache[etag] = body
+    return etag, body
+
+def api_response(etag, body):
+    """JSON response that collapses to a bodiless 304 on a matching If-None-Match."""
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+@app.route('/api/status')
+def api_status():
+    """Current snapshot of every section as compact JSON."""
+    return api_response(*api_payload(status.snapshot()))
+
+@app.route('/api/status/<section>')
+def api_status_section(section):
+    """One snapshot section (e.g. /api/status/services)."""
+    if section not in API_SECTIONS: abort(404)
+    return api_response(*api_payload(status.snapshot(), section))
+
+# Sections the page swaps in as server-rendered partials.
+FRAGMENT_SECTIONS = ["services", "inventory", "tickets", "admin_links"]
+
+@app.route('/fragments/<section>')
+def fragment(section):
+    """
+    The rendered partial for one section, as the page embeds it. The
+    dashboard script swaps these in, so tile markup only lives in
+    templates/partials/.
+    """
+    if section not in FRAGMENT_SECTIONS: abort(404)
+    snap = status.snapshot()
+    version = snap.sections[section].version if section in snap.sections else 0
+    page = fragment_cache.get((section, version, "encoded"), lambda: encode_page(str(render_fragment(snap, section))))
+    return page_response(page, f"{section}-{version}")
+
+@app.route('/events')
+def events():
+    """
+    Server-Sent Events stream of status transitions. Reconnecting clients
+    resume from Last-Event-ID. Each open stream holds one server thread,
+    so connections are capped below the Waitress thread count.
+    """
+    if bus.clients >= SSE_MAX_CLIENTS:
+        return Response("Too many event streams", status=503, headers={"Retry-After": "30"})
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    resp = Response(stream(bus, last_id), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+@app.route('/assets/<path:filename>')
+def asset_file(filename):
+    """
+    Content-hashed build output: cached for a year, in the best
+    pre-compressed variant the client accepts.
+    """
+    found = assets.find(filename, request.headers.get('Accept-Encoding'))
+    if found is None: abort(404)
+    path, encoding = found
+    resp = send_file(path, mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream", conditional=True)
+    if encoding: resp.headers["Content-Encoding"] = encoding
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Cache-Control"] = IMMUTABLE
+    return resp
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process answers and its refresher thread is running."""
+    if not status.alive:
+        return Response("refresher stopped", status=503, mimetype="text/plain")
+    return Response("ok", mimetype="text/plain")
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: 200 once the boot warm-up is done, 503 (with what is pending) before."""
+    if warmed.is_set():
+        return Response('{"status":"ready"}', mimetype="application/json")
+    body = json.dumps({"status": "warming", "pending": status.pending()})
+    return Response(body, status=503, mimetype="application/json", headers={"Retry-After": "1"})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of upstream, cache and snapshot metrics."""
+    snap = status.snapshot()
+    for name in snap.sections:
+        age = snap.age(name) if snap.sections[name].updated else None
+        if age is not None: metrics.SNAPSHOT_AGE.set(round(age, 3), section=name)
+    for name, state in list(breaker._upstreams.items()):
+        metrics.BREAKER_STATE.set(0 if state.breaker.state == breaker.CLOSED else 1, upstream=name)
+    metrics.SSE_CLIENTS.set(bus.clients)
+    metrics.SNAPSHOT_LEADER.set(1 if status.leading else 0)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/history')
+def api_history():
+    """24h/7d/30d uptime and current class for every provider."""
+    snap = status.snapshot()
+    section = snap.sections["history"]
+    etag = f"history-{section.version}"
+    return api_response(etag, json.dumps(section.data, separators=(",", ":")).encode())
+
+@app.route('/api/history/<path:provider>')
+def api_history_provider(provider):
+    """One provider: uptime, hourly (24h) and daily (30d) buckets, recent transitions."""
+    transitions = history.transitions(provider)
+    if not transitions and provider not in SERVICE_ORDER: abort(404)
+    body = {
+        "provider": provider,
+        "uptime": {label: history.uptime(provider, span) for label, span in WINDOWS.items()},
+        "hourly": history.series(provider, HOUR, 24),
+        "daily": history.series(provider, DAY, 30),
+        "transitions": transitions,
+    }
+    resp = Response(json.dumps(body, separators=(",", ":")), mimetype="application/json")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+# ==========================================
+# SECTION 5: CONFIG HOT RELOAD
+# ==========================================
+# A validated data.py edit is swapped in, and only the sections and caches
+# that read the changed settings are invalidated: new admin links re-render
+# the toolbox (on open screens too), they never trigger a Jamf/Intune/Graph
+# refetch.
+
+def inventory_rules(watchlist, source):
+    """Match rules for one MDM source; its counts only depend on these."""
+    return [(item['name'], item.get('match')) for item in watchlist if (item.get('match') or {}).get('source') == source]
+
+def apply_config(values, changed):
+    """
+    Builds everything the changed settings feed, then swaps it all in with
+    one globals().update(), so a request sees either the old or the new
+    config. Raises, swapping nothing, if the providers or rules do not build.
+    """
+    bindings = {name: values[name] for name in changed}
+    if "STATUS_PROVIDERS" in changed:
+        providers = build_providers(values["STATUS_PROVIDERS"])
+        bindings.update(PROVIDERS=providers, SERVICE_ORDER=[p.name for p in providers])
+    if "INVENTORY_WATCHLIST" in changed:
+        bindings.update(
+            jamf_classifier=Classifier(values["INVENTORY_WATCHLIST"], "jamf"),
+            intune_classifier=Classifier(values["INVENTORY_WATCHLIST"], "intune"),
+        )
+    if "JIRA_JQL" in changed:
+        bindings["jira_index"] = JiraIndex(JIRA_DOMAIN, JIRA_EMAIL, JIRA_API_TOKEN, values["JIRA_JQL"])
+
+    old_providers, old_watchlist = PROVIDERS, INVENTORY_WATCHLIST
+    globals().update(bindings)
+
+    if "ADMIN_LINKS" in changed:
+        status.invalidate("admin_links")
+    if "STATUS_PROVIDERS" in changed:
+        # Edited or removed providers start over; unchanged ones keep their
+        # breaker, last result and poll schedule, so they are not refetched.
+        current = {p.name: p.config for p in PROVIDERS}
+        for provider in old_providers:
+            if current.get(provider.name) != provider.config:
+                for source in provider.sources: breaker.forget(source.key)
+        status.invalidate("services")
+    if "INVENTORY_WATCHLIST" in changed:
+        # MDM counts are only refetched for a source whose match rules changed;
+        # thresholds and mock counts just re-run the (cached) inventory.
+        for source in ("jamf", "intune"):
+            if inventory_rules(old_watchlist, source) != inventory_rules(INVENTORY_WATCHLIST, source):
+                breaker.forget(source)
+        status.invalidate("inventory")
+    if changed & {"RAW_TICKETS", "JIRA_JQL"}:
+        status.invalidate("tickets")
+    if "ON_CALL_USER" in changed:
+        status.invalidate("on_call")
+    if "MAINTENANCE_INFO" in changed:
+        status.invalidate("maintenance")
+    print(f"Config Reloaded: {', '.join(sorted(changed))}")
+
+config_watcher = ConfigWatcher(data.__file__, apply_config) if CONFIG_RELOAD else None
+
+# ==========================================
+# SECTION 6: BOOT WARM-UP
+# ==========================================
+# The last-known snapshot is served as soon as the process is up; meanwhile
+# every section loads in parallel (one refresher thread each) and the page is
+# rendered once so templates are compiled before the first viewer arrives.
+# None of this runs on import: only the serving entry points call boot(), so
+# the tests and bench.py never poll the real upstreams by accident.
+
+warmed = threading.Event()
+warm_up_thread = None
+warm_up_lock = threading.Lock()
+
+def warm_up():
+    started = time.monotonic()
+    while status.pending() and time.monotonic() - started < WARMUP_TIMEOUT:
+        time.sleep(0.05)
+    if status.pending():
+        print(f"Warm-up Timeout: still loading {', '.join(status.pending())}")
+    try:
+        with app.test_request_context('/'):
+            index()
+    except Exception as e:
+        print(f"Warm-up Error (render): {e}")
+    warmed.set()
+    print(f"Warm-up Done: {time.monotonic() - started:.2f}s")
+
+def start_warm_up():
+    """Starts the warm-up once; safe to call repeatedly."""
+    global warm_up_thread
+    with warm_up_lock:
+        if warm_up_thread is None:
+            warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+            warm_up_thread.start()
+
+def boot():
+    """
+    Serving start-up: restores the saved snapshot, starts polling, the
+    warm-up and the config watcher, and releases the shared lease on exit.
+    """
+    if SNAPSHOT_FILE:
+        restored = status.restore()
+        if restored: print(f"Snapshot Restored: {', '.join(restored)}")
+    status.start()  # Every section is due at once
+    if WARMUP:
+        start_warm_up()
+    else:
+        warmed.set()
+    if config_watcher: config_watcher.start()
+    if status.shared:
+        # Hand the lease over on shutdown rather than after LEASE_TTL. SIGTERM
+        # (docker stop) is turned into a normal exit so atexit runs.
+        atexit.register(status.shared.release)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
 if __name__ == '__main__':
-    # Runs the local development server
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Runs the local development server (booted once, in the reloader's child)
+    if os.getenv("WERKZEUG_RUN_MAIN") == "true": boot()
+    app.run(debug=True, port=5000)
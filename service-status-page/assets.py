@@ -0,0 +1,75 @@
+"""
+Self-hosted frontend assets (built by build_assets.py).
+
+static/dist/manifest.json maps logical names ('app.css', 'dashboard.js') and
+the original URLs of provider logos / admin link icons to content-hashed
+files. A hashed file never changes, so it is served with a one-year
+immutable Cache-Control, in the smallest pre-compressed variant (br, gzip)
+the client accepts.
+
+Without a build (a plain checkout) url() falls back to static/src/ for
+logical names and to the original URL for images: the dashboard still works,
+just with the Tailwind CDN and hot-linked logos.
+"""
+import json
+import os
+
+DIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "dist")
+PREFIX = "/assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Pre-compressed variants in order of preference: (Content-Encoding, suffix).
+VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header):
+    """Content codings named in an Accept-Encoding header (q=0 entries excluded)."""
+    codings = set()
+    for part in (header or "").split(","):
+        name, _, params = part.partition(";")
+        key, _, value = params.strip().partition("=")
+        try:
+            refused = key.strip() == "q" and float(value) == 0
+        except ValueError:
+            refused = False
+        if name.strip() and not refused:
+            codings.add(name.strip().lower())
+    return codings
+
+
+class Assets:
+    """Manifest lookups and variant selection for static/dist/."""
+
+    def __init__(self, directory=DIST):
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, "manifest.json")) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+        except ValueError as e:
+            print(f"Assets Error (manifest): {e}")
+            self.manifest = {}
+        # Only files listed in the manifest are ever served.
+        self.files = set(self.manifest.values())
+
+    def built(self, name):
+        return name in self.manifest
+
+    def url(self, name):
+        """Hashed URL for a built asset; the unbuilt source or remote URL otherwise."""
+        if name in self.manifest:
+            return PREFIX + self.manifest[name]
+        if not name or "://" in name:
+            return name
+        return f"/static/src/{name}"
+
+    def find(self, filename, accept_encoding=""):
+        """(path, Content-Encoding or None) of the best variant of a built file, or None."""
+        if filename not in self.files:
+            return None
+        path = os.path.join(self.directory, filename)
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, suffix in VARIANTS:
+            if encoding in accepted and os.path.exists(path + suffix):
+                return path + suffix, encoding
+        return path, None
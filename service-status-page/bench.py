@@ -0,0 +1,369 @@
+"""
+Benchmark and load-test harness for the dashboard.
+
+Starts local stand-ins for every upstream (GitHub and Atlassian Statuspage
+APIs, AWS/Microsoft RSS, Jamf Pro, Entra ID + Microsoft Graph) with
+configurable latency, payload size, error rate and pagination, mounts an
+adapter on the shared fetch layer's sessions that sends every upstream to
+them, then measures:
+
+* the collectors (get_health_data, get_inventory) run cold,
+* `/` and `/api/status` under concurrent clients through Waitress,
+
+and prints one JSON report (latency percentiles, throughput, upstream call
+counts, peak RSS) so runs can be diffed between versions.
+
+    python bench.py --latency-ms 200 --error-rate 0.05 --clients 50 --output bench.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+# The harness drives the refresher itself and never calls app.boot(): no
+# warm-up against the real upstreams, and no snapshot saved over (or
+# restored from) the dashboard's own, and the fake tiles never reach the
+# real history database.
+os.environ.setdefault("SNAPSHOT_FILE", "")
+os.environ.setdefault("HISTORY_DB", ":memory:")
+import app
+import breaker
+import data
+import fetch
+from providers import load_providers
+
+JAMF_MODELS = ["MacBook Air (15-inch, M3, 2024)", "MacBook Pro (16-inch, 2024)", "MacBook Air (13-inch, M2)"]
+INTUNE_MODELS = [("HP EliteBook 840 G11", 16), ("HP EliteBook 840 G11", 48), ("HP ProBook 450 G10", 16)]
+
+
+# ==========================================
+# FAKE UPSTREAMS
+# ==========================================
+
+class FakeUpstreams(ThreadingHTTPServer):
+    """One local server answering for every upstream, routed by path prefix."""
+
+    daemon_threads = True
+
+    def __init__(self, opts):
+        super().__init__(("127.0.0.1", 0), UpstreamHandler)
+        self.opts = opts
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, key):
+        with self.lock:
+            self.calls[key] += 1
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.do_GET()
+
+    def do_GET(self):
+        opts = self.server.opts
+        url = urlsplit(self.path)
+        kind = url.path.split("/")[1]
+        self.server.count(kind)
+
+        time.sleep(max(0.0, opts.latency_ms + random.uniform(-opts.jitter_ms, opts.jitter_ms)) / 1000)
+        if random.random() < opts.error_rate:
+            return self._send(500, b"injected failure", "text/plain")
+
+        query = parse_qs(url.query)
+        if kind == "statuspage":
+            body = json.dumps(statuspage_summary(opts)).encode()
+        elif kind == "awshealth":
+            body = json.dumps(aws_events(opts)).encode("utf-16")
+            return self._send(200, body, "application/json", cacheable=True)
+        elif kind == "rss":
+            return self._send(200, rss_feed(opts), "application/rss+xml", cacheable=True)
+        elif kind == "jamf" and url.path.endswith("/auth/token"):
+            expires = (datetime.now(timezone.utc) + timedelta(minutes=30)).isoformat()
+            body = json.dumps({"token": "bench", "expires": expires}).encode()
+        elif kind == "jamf":
+            body = json.dumps(jamf_page(opts, query)).encode()
+        elif kind == "login":
+            body = json.dumps({"access_token": "bench", "expires_in": 3599}).encode()
+        elif kind == "graph":
+            body = json.dumps(graph_page(opts, self.path, query)).encode()
+        else:
+            return self._send(404, b"unknown upstream", "text/plain")
+        self._send(200, body, "application/json", cacheable=kind == "statuspage")
+
+    def _send(self, code, body, content_type, cacheable=False):
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if cacheable and self.headers.get("If-None-Match") == etag:
+            self.server.count("not_modified")
+            code, body = 304, b""
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if cacheable: self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def incidents(opts):
+    if random.random() >= opts.incident_rate:
+        return []
+    return [{"name": f"Elevated errors ({i})", "impact": "minor", "created_at": "2024-01-01T10:00:00Z"} for i in range(2)]
+
+
+def statuspage_summary(opts):
+    components = [{"name": n, "status": "operational"} for n in data.GITHUB_WATCHLIST]
+    components += [{"name": f"Component {i}", "status": "operational"} for i in range(opts.payload_items)]
+    return {"status": {"indicator": "none"}, "components": components, "incidents": incidents(opts)}
+
+
+def aws_events(opts):
+    """AWS Health current-events document covering every configured slug."""
+    if random.random() >= opts.incident_rate:
+        return []
+    return [
+        {"service": f"{slug}-{region}", "status": "2", "summary": "Increased API error rates", "date": str(int(time.time()))}
+        for _, slug in data.AWS_SERVICES for region in data.AWS_REGIONS
+    ]
+
+
+def rss_feed(opts):
+    now = datetime.now(timezone.utc)
+    items = "".join(
+        f"<item><title>Service is operating normally ({i})</title>"
+        f"<pubDate>{format_datetime(now - timedelta(hours=i))}</pubDate>"
+        f"<description>{'x' * 200}</description></item>"
+        for i in range(opts.payload_items)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>bench</title>{items}</channel></rss>'.encode()
+
+
+def jamf_page(opts, query):
+    page, size = int(query.get("page", ["0"])[0]), int(query.get("page-size", ["100"])[0])
+    start, end = page * size, min(opts.devices, (page + 1) * size)
+    results = [{
+        "hardware": {"model": JAMF_MODELS[i % len(JAMF_MODELS)], "totalRamMegabytes": 16384},
+        "userAndLocation": {"username": "" if i % 3 else "someone"},
+    } for i in range(start, end)]
+    return {"totalCount": opts.devices, "results": results}
+
+
+def graph_page(opts, path, query):
+    offset = int(query.get("$skiptoken", ["0"])[0])
+    end = min(opts.devices, offset + opts.page_size)
+    value = []
+    for i in range(offset, end):
+        model, ram = INTUNE_MODELS[i % len(INTUNE_MODELS)]
+        value.append({"model": model, "totalPhysicalMemoryInBytes": ram * 1024 ** 3})
+    body = {"value": value}
+    if end < opts.devices:
+        # Real Graph returns absolute links; they go back through RewriteAdapter.
+        base = path.split("/", 2)[2].split("&$skiptoken=")[0]
+        body["@odata.nextLink"] = f"https://graph.microsoft.com/{base}&$skiptoken={end}"
+    return body
+
+
+class RewriteAdapter:
+    """Sends one upstream's URLs to the fake server through the session's own (metered) adapter."""
+
+    def __init__(self, prefix, target, inner):
+        self.prefix, self.target, self.inner = prefix, target, inner
+
+    def send(self, request, **kwargs):
+        request.url = self.target + request.url[len(self.prefix):]
+        return self.inner.send(request, **kwargs)
+
+    def close(self):
+        self.inner.close()
+
+
+def add_providers(count):
+    """Registers `count` synthetic Statuspage vendors to load the registry."""
+    app.PROVIDERS.extend(load_providers(
+        {"name": f"Vendor {i}", "adapter": "statuspage", "url": f"https://vendor{i}.status.test/api/v2/summary.json"}
+        for i in range(count)
+    ))
+
+
+def route_upstreams(base):
+    """Points every upstream the app knows about at the fake server."""
+    rewrites = {
+        "https://status.aws.amazon.com": f"{base}/rss/status.aws.amazon.com",
+        "https://login.microsoftonline.com": f"{base}/login",
+        "https://graph.microsoft.com": f"{base}/graph",
+        app.JAMF_URL: f"{base}/jamf",
+    }
+    for provider in app.PROVIDERS:
+        kind = {"rss": "rss", "aws_health": "awshealth"}.get(provider.config.get("adapter"), "statuspage")
+        for source in provider.sources:
+            parts = urlsplit(source.url)
+            rewrites[f"{parts.scheme}://{parts.netloc}"] = f"{base}/{kind}/{parts.netloc}"
+    for prefix, target in rewrites.items():
+        session = fetch.session_for(prefix)
+        session.mount(prefix, RewriteAdapter(prefix, target, session.get_adapter(prefix)))
+
+    # Pretend MDM credentials are configured so the inventory collectors run.
+    app.USE_JAMF = app.USE_INTUNE = True
+    app.JAMF_USER, app.JAMF_PASS, app.AZURE_CLIENT_SECRET = "bench", "bench", "bench"
+
+
+# ==========================================
+# MEASUREMENT
+# ==========================================
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples, elapsed=None, errors=0):
+    if not samples:
+        return {"runs": 0, "errors": errors}
+    ms = [s * 1000 for s in samples]
+    report = {
+        "runs": len(ms), "errors": errors,
+        "mean_ms": round(sum(ms) / len(ms), 2),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2),
+    }
+    if elapsed:
+        report["throughput_rps"] = round(len(ms) / elapsed, 1)
+    return report
+
+
+def bench_collector(fn, iterations, reset):
+    """Times `fn` cold: upstream schedules and breakers are reset before every run."""
+    samples = []
+    for _ in range(iterations):
+        reset()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def bench_http(base, path, clients, per_client, conditional=False):
+    """Hammers one route with concurrent keep-alive clients."""
+    def client(_):
+        session, etag, samples, errors = requests.Session(), None, [], 0
+        for _ in range(per_client):
+            headers = {"If-None-Match": etag} if conditional and etag else {}
+            started = time.perf_counter()
+            try:
+                resp = session.get(base + path, headers=headers, timeout=30)
+                if resp.status_code >= 400: errors += 1
+                etag = resp.headers.get("ETag", etag)
+            except requests.RequestException:
+                errors += 1
+            samples.append(time.perf_counter() - started)
+        return samples, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - started
+    return summarize([s for r in results for s in r[0]], elapsed, sum(r[1] for r in results))
+
+
+def reset_upstreams():
+    breaker._upstreams.clear()
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(opts):
+    from waitress import create_server
+
+    upstreams = FakeUpstreams(opts)
+    threading.Thread(target=upstreams.serve_forever, daemon=True).start()
+    add_providers(opts.providers)
+    route_upstreams(upstreams.base)
+
+    report = {"meta": {
+        "revision": git_revision(), "python": platform.python_version(),
+        "started": datetime.now(timezone.utc).isoformat(), "options": vars(opts),
+    }}
+
+    # --- Collectors (cold: every upstream is fetched) ---
+    report["collectors"] = {
+        "get_health_data": bench_collector(app.get_health_data, opts.iterations, reset_upstreams),
+        "get_inventory": bench_collector(app.get_inventory, opts.iterations, reset_upstreams),
+    }
+    report["collector_upstream_calls"] = dict(upstreams.calls)
+    upstreams.calls.clear()
+
+    # --- HTTP (warm snapshot, concurrent screens) ---
+    app.status.refresh_all()
+    server = create_server(app.app, host="127.0.0.1", port=0, threads=opts.server_threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{server.effective_port}"
+    report["http"] = {
+        "/": bench_http(base, "/", opts.clients, opts.requests),
+        "/api/status": bench_http(base, "/api/status", opts.clients, opts.requests, conditional=True),
+    }
+    server.close()
+
+    report["http_upstream_calls"] = dict(upstreams.calls)
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    upstreams.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=100, help="Base upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="+/- random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls answered with 500")
+    parser.add_argument("--incident-rate", type=float, default=0.1, help="Fraction of status answers with incidents")
+    parser.add_argument("--payload-items", type=int, default=20, help="Feed entries / extra components per response")
+    parser.add_argument("--providers", type=int, default=0, help="Extra synthetic Statuspage providers")
+    parser.add_argument("--devices", type=int, default=2000, help="Devices behind Jamf and Graph")
+    parser.add_argument("--page-size", type=int, default=500, help="Graph page size")
+    parser.add_argument("--iterations", type=int, default=5, help="Cold collector runs")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent HTTP clients (screens)")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--server-threads", type=int, default=16, help="Waitress threads")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    opts = parser.parse_args()
+
+    report = json.dumps(run(opts), indent=2)
+    if opts.output:
+        with open(opts.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Per-upstream circuit breakers and adaptive poll cadence.
+
+Every upstream (GitHub, each AWS feed, each Statuspage, Jamf, Graph...) gets
+an Upstream record holding its CircuitBreaker, the last good result and when
+it is next due:
+
+* closed    -> requests flow; FAILURE_THRESHOLD consecutive failures open it.
+* open      -> no requests; the last known value is served marked as stale.
+               Retried after an exponential, jittered back-off.
+* half-open -> one trial request; success closes, failure re-opens longer.
+
+Cadence adapts to what the source reports: POLL_FAST while it shows an
+active incident, POLL_SLOW once it has been healthy for QUIET_AFTER seconds,
+its normal interval (POLL_NORMAL unless configured) otherwise.
+"""
+import random
+import threading
+import time
+from concurrent.futures import wait
+from functools import partial
+
+FAILURE_THRESHOLD = 3
+BACKOFF_BASE = 30
+BACKOFF_MAX = 900
+
+POLL_FAST = 30
+POLL_NORMAL = 60
+POLL_SLOW = 300
+QUIET_AFTER = 2 * 3600
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker with jittered exponential back-off."""
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+        self.threshold = threshold
+        self.base = base
+        self.cap = cap
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a request may be sent now (claims the half-open trial)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self.retry_at:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state, self.failures, self.trips = CLOSED, 0, 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                delay = min(self.cap, self.base * (2 ** self.trips))
+                self.retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                self.state = OPEN
+                self.trips += 1
+
+
+def is_active(result):
+    """Whether a result reports an ongoing incident (drives POLL_FAST)."""
+    if isinstance(result, dict):
+        if "class" in result:
+            return result["class"] in ("warning", "critical")
+        return "impact" in result  # Statuspage incident
+    return False
+
+
+def stale(value):
+    """Copy of a last-known tile flagged for the 'stale' badge."""
+    return dict(value, stale=True) if isinstance(value, dict) else value
+
+
+class Upstream:
+    """Breaker, last good value and poll schedule for one upstream."""
+
+    def __init__(self, name, normal=POLL_NORMAL):
+        self.name = name
+        self.normal = normal
+        self.breaker = CircuitBreaker()
+        self.last = None
+        self.has_value = False
+        self.next_due = 0.0
+        self.healthy_since = None
+        # Future of the fetch currently queued or running, if any.
+        self.inflight = None
+
+    def due(self):
+        return not self.has_value or time.monotonic() >= self.next_due
+
+    def interval(self):
+        if is_active(self.last):
+            return min(POLL_FAST, self.normal)
+        if self.healthy_since and time.monotonic() - self.healthy_since >= QUIET_AFTER:
+            return max(POLL_SLOW, self.normal)
+        return self.normal
+
+    def record_success(self, result):
+        self.breaker.success()
+        self.last, self.has_value = result, True
+        now = time.monotonic()
+        if is_active(result):
+            self.healthy_since = None
+        elif self.healthy_since is None:
+            self.healthy_since = now
+        self.next_due = now + self.interval()
+
+    def record_failure(self, error):
+        self.breaker.failure()
+        print(f"Upstream Error ({self.name}, breaker {self.breaker.state}): {error}")
+
+    def fallback(self, default=None):
+        """Last known value marked stale, or default if there is none."""
+        return stale(self.last) if self.has_value else default
+
+    def call(self, fn, *args, default=None):
+        """
+        Synchronous guarded call. Serves the cached value while not due and
+        the stale value while the breaker is open or the call fails.
+        """
+        if not self.due():
+            return self.last
+        if not self.breaker.allow():
+            return self.fallback(default)
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self.record_failure(e)
+            return self.fallback(default)
+        self.record_success(result)
+        return result
+
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+def upstream(name, interval=None):
+    """
+    Returns the shared Upstream record for a name, creating it on first use.
+    `interval` (seconds) overrides its normal poll interval.
+    """
+    with _upstreams_lock:
+        state = _upstreams.get(name)
+        if state is None:
+            state = _upstreams[name] = Upstream(name)
+        if interval:
+            state.normal = interval
+    return state
+
+
+def forget(name):
+    """Drops an upstream's record (its breaker, last value and schedule)."""
+    with _upstreams_lock:
+        _upstreams.pop(name, None)
+
+
+def record_outcome(state, future):
+    """Feeds a finished job (even one that missed the deadline) to its breaker."""
+    if future.cancelled():
+        return  # Dropped at shutdown (main.py --once): it never ran
+    if future.exception():
+        state.record_failure(future.exception())
+    else:
+        state.record_success(future.result())
+
+
+def run_fanout(jobs, pool, deadline):
+    """
+    Runs (upstream key, fn, args, fallback) jobs on `pool` under one shared
+    deadline (a time.monotonic() value). Returns (result, fresh) pairs in
+    job order.
+
+    Upstreams that are not yet due (see Upstream.interval) reuse their last
+    result; those with an open breaker, that raise, or that are still
+    running at the deadline yield their last known value marked stale, or
+    the fallback if they never answered. Late jobs keep running in the
+    background and still update their breaker when they finish.
+    """
+    results = [None] * len(jobs)
+    pending = []
+    for i, (key, fn, args, fallback) in enumerate(jobs):
+        state = upstream(key)
+        if not state.due():
+            results[i] = (state.last, True)
+        elif state.inflight is not None and not state.inflight.done():
+            # Still queued or running from an earlier cycle: wait on that
+            # fetch instead of stacking a duplicate behind it.
+            pending.append((i, state.inflight, state, fallback))
+        elif not state.breaker.allow():
+            results[i] = (state.fallback(fallback), False)
+        else:
+            future = state.inflight = pool.submit(fn, *args)
+            future.add_done_callback(partial(record_outcome, state))
+            pending.append((i, future, state, fallback))
+
+    wait([future for _, future, _, _ in pending], timeout=max(0, deadline - time.monotonic()))
+    for i, future, state, fallback in pending:
+        if future.done() and not future.cancelled() and not future.exception():
+            results[i] = (future.result(), True)
+        else:
+            results[i] = (state.fallback(fallback), False)
+    return results
@@ -0,0 +1,154 @@
+"""
+Builds the self-hosted frontend assets into static/dist/ (run in the Docker
+build, see dockerfile; safe to run locally too).
+
+1. CSS: static/src/app.css is compiled by the Tailwind standalone CLI
+   (TAILWIND_BIN, default 'tailwindcss') against tailwind.config.js: only the
+   utilities the templates and dashboard.js use are emitted, minified.
+   Without the CLI the CSS step is skipped and the page keeps the CDN.
+2. JS: static/src/dashboard.js is copied as-is.
+3. Images: every provider logo and ADMIN_LINKS icon in data.py is
+   downloaded, so wall displays never hot-link third-party hosts. An image
+   that cannot be fetched keeps its remote URL.
+4. Every file gets a content-hashed name (app.3f2a9c1e0b.css) and, where it
+   pays off, .gz and .br (with the optional 'brotli' package) siblings.
+   static/dist/manifest.json maps logical names and original URLs to them.
+
+    python build_assets.py [--skip-images]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from urllib.parse import urlsplit
+
+from assets import DIST
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(ROOT, "static", "src")
+TAILWIND_BIN = os.getenv("TAILWIND_BIN", "tailwindcss")
+
+# Types worth pre-compressing (images other than SVG already are).
+COMPRESSIBLE = (".css", ".js", ".svg", ".ico")
+# Smaller bodies fit in one packet either way.
+MIN_COMPRESS = 512
+IMAGE_TYPES = {
+    "image/svg+xml": ".svg", "image/png": ".png", "image/jpeg": ".jpg",
+    "image/gif": ".gif", "image/webp": ".webp", "image/x-icon": ".ico", "image/vnd.microsoft.icon": ".ico",
+}
+
+
+def compress_variants(path, content):
+    """Writes .gz / .br siblings when they are smaller than the original."""
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    try:
+        import brotli  # Optional: br variants are skipped without it
+        variants.append((".br", brotli.compress(content, quality=11)))
+    except ImportError:
+        pass
+    for suffix, packed in variants:
+        if len(packed) < len(content):
+            with open(path + suffix, "wb") as f:
+                f.write(packed)
+
+
+def emit(manifest, key, stem, ext, content):
+    """Writes content under a hashed name and records it in the manifest."""
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    filename = f"{stem}.{digest}{ext}"
+    path = os.path.join(DIST, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    if ext in COMPRESSIBLE and len(content) >= MIN_COMPRESS:
+        compress_variants(path, content)
+    manifest[key] = filename
+    return filename
+
+
+def build_css():
+    """Purged, minified CSS from the Tailwind CLI, or None if it is not installed."""
+    if shutil.which(TAILWIND_BIN) is None:
+        print(f"Tailwind CLI not found ({TAILWIND_BIN}); skipping CSS, the page keeps the CDN", file=sys.stderr)
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "app.css")
+        subprocess.run(
+            [TAILWIND_BIN, "-c", os.path.join(ROOT, "tailwind.config.js"),
+             "-i", os.path.join(SRC, "app.css"), "-o", out, "--minify"],
+            cwd=ROOT, check=True,
+        )
+        with open(out, "rb") as f:
+            return f.read()
+
+
+def image_urls():
+    """Remote logo and icon URLs referenced by data.py."""
+    from data import ADMIN_LINKS, STATUS_PROVIDERS
+    urls = [p.get("logo") for p in STATUS_PROVIDERS] + [link.get("icon") for link in ADMIN_LINKS]
+    return sorted({url for url in urls if url and "://" in url})
+
+
+def image_stem(url):
+    """Readable file stem for an image URL, e.g. 'img/github-githubstatus-com'."""
+    parts = urlsplit(url)
+    query = dict(p.partition("=")[::2] for p in parts.query.split("&") if p)
+    # Favicon services name the site in the query string.
+    label = query.get("domain") or f"{parts.netloc}-{os.path.splitext(os.path.basename(parts.path))[0]}"
+    return "img/" + (re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")[:48] or "image")
+
+
+def fetch_image(url, timeout=10):
+    """(content, extension) of a remote image; raises on failure."""
+    import requests
+    resp = requests.get(url, timeout=timeout, headers={"User-Agent": "service-status-page asset build"})
+    resp.raise_for_status()
+    kind = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    ext = IMAGE_TYPES.get(kind) or os.path.splitext(urlsplit(url).path)[1].lower() or mimetypes.guess_extension(kind)
+    if not kind.startswith("image/") and ext not in IMAGE_TYPES.values():
+        raise ValueError(f"not an image ({kind or 'no content type'})")
+    return resp.content, ext
+
+
+def build(skip_images=False):
+    shutil.rmtree(DIST, ignore_errors=True)
+    os.makedirs(DIST)
+    manifest = {}
+
+    css = build_css()
+    if css is not None:
+        emit(manifest, "app.css", "app", ".css", css)
+    with open(os.path.join(SRC, "dashboard.js"), "rb") as f:
+        emit(manifest, "dashboard.js", "dashboard", ".js", f.read())
+
+    if not skip_images:
+        for url in image_urls():
+            try:
+                content, ext = fetch_image(url)
+            except Exception as e:
+                print(f"Image Error ({url}): {e}; keeping the remote URL", file=sys.stderr)
+                continue
+            emit(manifest, url, image_stem(url), ext, content)
+
+    with open(os.path.join(DIST, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build static/dist/ (hashed, compressed frontend assets).")
+    parser.add_argument("--skip-images", action="store_true", help="do not download logos and icons")
+    opts = parser.parse_args(argv)
+    manifest = build(opts.skip_images)
+    print(f"Built {len(manifest)} assets into {os.path.relpath(DIST, ROOT)}/")
+
+
+if __name__ == "__main__":
+    main()
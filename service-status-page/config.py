@@ -0,0 +1,139 @@
+"""
+Hot reload of data.py.
+
+ConfigWatcher polls the file's mtime and size. When they change, the file is
+executed into a fresh module (the running `data` module is left alone),
+checked with validate(), and compared with the running config one setting at
+a time. Only then is apply(values, changed) called, where `changed` holds
+the RELOADABLE names whose value actually differs. An edit that fails to
+import or validate is logged and the running config is kept; apply() may
+also raise to reject it before swapping anything in.
+
+Credentials and endpoints (JAMF_URL, AZURE_*, JIRA_DOMAIN, ...) are read from
+the environment at import and still need a restart; a change to one of them
+in data.py is logged as such.
+"""
+import importlib.util
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+# Settings swapped in at runtime.
+RELOADABLE = (
+    "ADMIN_LINKS", "INVENTORY_WATCHLIST", "STATUS_PROVIDERS",
+    "ON_CALL_USER", "MAINTENANCE_INFO", "RAW_TICKETS", "JIRA_JQL",
+)
+# Settings that only take effect after a restart.
+RESTART_ONLY = (
+    "JAMF_URL", "JAMF_USER", "JAMF_PASS", "USE_JAMF", "USE_INTUNE",
+    "AZURE_TENANT_ID", "AZURE_CLIENT_ID", "AZURE_CLIENT_SECRET",
+    "JIRA_DOMAIN", "JIRA_EMAIL", "JIRA_API_TOKEN",
+)
+# JIRA_JQL is wrapped in delta clauses with its own ordering appended.
+ORDER_BY = re.compile(r"\border\s+by\b", re.IGNORECASE)
+
+
+def load(path):
+    """Executes a data.py-style file and returns its settings as a dict."""
+    spec = importlib.util.spec_from_file_location("_data_reload", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return {name: getattr(module, name) for name in RELOADABLE + RESTART_ONLY if hasattr(module, name)}
+
+
+def _require(ok, message):
+    if not ok:
+        raise ValueError(message)
+
+
+def validate(values):
+    """Shape checks for the reloadable settings; raises ValueError on the first problem."""
+    missing = [name for name in RELOADABLE if name not in values]
+    _require(not missing, f"missing {', '.join(missing)}")
+
+    _require(isinstance(values["ADMIN_LINKS"], list), "ADMIN_LINKS must be a list")
+    for link in values["ADMIN_LINKS"]:
+        _require(isinstance(link, dict) and link.get("name") and link.get("url"), f"ADMIN_LINKS: bad entry {link!r}")
+
+    _require(isinstance(values["INVENTORY_WATCHLIST"], list), "INVENTORY_WATCHLIST must be a list")
+    names = [item.get("name") for item in values["INVENTORY_WATCHLIST"] if isinstance(item, dict)]
+    _require(len(names) == len(values["INVENTORY_WATCHLIST"]) and all(names), "INVENTORY_WATCHLIST: every item needs a name")
+    _require(len(set(names)) == len(names), "INVENTORY_WATCHLIST: duplicate names")
+
+    _require(isinstance(values["STATUS_PROVIDERS"], list), "STATUS_PROVIDERS must be a list")
+    _require(isinstance(values["ON_CALL_USER"], dict), "ON_CALL_USER must be a dict")
+    _require(isinstance(values["RAW_TICKETS"], list), "RAW_TICKETS must be a list")
+    _require(isinstance(values["JIRA_JQL"], str) and values["JIRA_JQL"].strip(), "JIRA_JQL must be a non-empty string")
+    _require(not ORDER_BY.search(values["JIRA_JQL"]), "JIRA_JQL: drop the ORDER BY clause (newest updates come first)")
+
+    window = values["MAINTENANCE_INFO"]
+    _require(isinstance(window, dict), "MAINTENANCE_INFO must be a dict")
+    start, end = window.get("start"), window.get("end")
+    _require(all(v is None or isinstance(v, datetime) for v in (start, end)), "MAINTENANCE_INFO: start/end must be datetimes or None")
+    _require(not (start and end) or start <= end, "MAINTENANCE_INFO: start is after end")
+
+
+class ConfigWatcher:
+    """Polls a config file and hands validated changes to apply(values, changed)."""
+
+    def __init__(self, path, apply, interval=2.0):
+        self.path = path
+        self.apply = apply
+        self.interval = interval
+        self.reloads = 0
+        self._stamp = self._stat()
+        self._values = load(path)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def check(self):
+        """Reloads if the file changed since the last check. Returns the changed names."""
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return set()
+        self._stamp = stamp
+        try:
+            values = load(self.path)
+            validate(values)
+        except Exception as e:
+            print(f"Config Error ({os.path.basename(self.path)}): {e}; keeping the running config")
+            return set()
+
+        changed = {name for name in RELOADABLE if values.get(name) != self._values.get(name)}
+        restart = [name for name in RESTART_ONLY if values.get(name) != self._values.get(name)]
+        if restart:
+            print(f"Config Notice: {', '.join(restart)} changed; restart to apply")
+        if not changed:
+            self._values = values
+            return set()
+        try:
+            self.apply(values, changed)
+        except Exception as e:
+            print(f"Config Error ({os.path.basename(self.path)}): {e}; keeping the running config")
+            return set()
+        self._values = values
+        self.reloads += 1
+        return changed
+
+    def start(self):
+        """Starts the polling thread once; safe to call repeatedly."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
@@ -17,6 +17,9 @@ AZURE_CLIENT_SECRET = os.getenv("AZURE_CLIENT_SECRET")
 JIRA_DOMAIN = os.getenv("JIRA_DOMAIN", "your-domain.atlassian.net")
 JIRA_EMAIL = os.getenv("JIRA_EMAIL")
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN")
+# Scope of the ticket sidebar; ordering (newest update first) is added.
+# Resolved (Done category) issues are dropped whatever this matches.
+JIRA_JQL = os.getenv("JIRA_JQL", "project = IT AND statusCategory != Done")
 
 # AUTOMATION TOGGLES
 USE_JAMF = True if (JAMF_USER and JAMF_PASS) else False
@@ -44,11 +47,20 @@ ADMIN_LINKS = [
 
 # --- HARDWARE INVENTORY WATCHLIST ---
 # MOCK DATA APPLIED: 2 > 10, 1 at 4, 1 at 0
+# "match" tells the live collectors how to recognise the SKU:
+#   source       -> 'jamf' or 'intune'
+#   model_prefix -> sent to the MDM as a server-side filter (optional)
+#   model        -> case-insensitive regex searched in the model string
+#   ram_gb / storage_gb -> optional inclusive [min, max] bins
 INVENTORY_WATCHLIST = [
-    {"name": "HP G11 (16GB RAM)", "count": 12, "threshold": 5, "category": "Workstations"},
-    {"name": "HP G11 (48GB RAM)", "count": 15, "threshold": 5, "category": "Workstations"},
-    {"name": "MacBook Air 15\"", "count": 4, "threshold": 5, "category": "Laptops"},
-    {"name": "MacBook M4 Pro 16\"", "count": 0, "threshold": 2, "category": "Laptops"}
+    {"name": "HP G11 (16GB RAM)", "count": 12, "threshold": 5, "category": "Workstations",
+     "match": {"source": "intune", "model_prefix": "HP", "model": r"g11", "ram_gb": [14, 18]}},
+    {"name": "HP G11 (48GB RAM)", "count": 15, "threshold": 5, "category": "Workstations",
+     "match": {"source": "intune", "model_prefix": "HP", "model": r"g11", "ram_gb": [44, 52]}},
+    {"name": "MacBook Air 15\"", "count": 4, "threshold": 5, "category": "Laptops",
+     "match": {"source": "jamf", "model_prefix": "MacBook", "model": r"air.*15"}},
+    {"name": "MacBook M4 Pro 16\"", "count": 0, "threshold": 2, "category": "Laptops",
+     "match": {"source": "jamf", "model_prefix": "MacBook", "model": r"pro.*16"}}
 ]
 
 # --- GITHUB COMPONENT WATCHLIST ---
@@ -56,13 +68,56 @@ GITHUB_WATCHLIST = [
     "Git Operations", "API Requests", "Actions", "Pull Requests", "Issues", "Copilot", "Pages"
 ]
 
-# --- ATLASSIAN API TARGETS ---
-ATLASSIAN_TARGETS = [
-    {"name": "Jira Software", "api": "https://jira-software.status.atlassian.com/api/v2/summary.json"},
-    {"name": "Jira Service Management", "api": "https://jsm.status.atlassian.com/api/v2/summary.json"},
-    {"name": "Jira Work Management", "api": "https://jwm.status.atlassian.com/api/v2/summary.json"},
-    {"name": "Confluence", "api": "https://confluence.status.atlassian.com/api/v2/summary.json"},
-    {"name": "Atlassian Rovo", "api": "https://rovo.status.atlassian.com/api/v2/summary.json"}
+# --- STATUS PROVIDERS ---
+# One entry per tile on the services grid, in display order (see providers.py).
+#   adapter   -> 'statuspage' (summary.json), 'rss' (RSS/Atom) or 'custom'
+#   url       -> single source; or "sources": [{"name", "url"}, ...] folded into one tile
+#   link/logo/tag -> tile link, logo and default badge
+#   ok_status -> status text while nothing is reported
+#   interval  -> normal poll interval in seconds (default 60; incidents poll faster)
+#   entries   -> newest incidents/feed items considered (default 3)
+#   components  (statuspage) -> only these components (and incidents on them) affect the tile
+#   open_status (rss)        -> any unresolved item is a warning with this text
+#   service/regions (aws_health) -> AWS Health service slug and regions covered
+#   collect     (custom)     -> "module:function" called as fn(provider, source)
+
+# --- AWS HEALTH ---
+# One tile per service, covering every listed region. All AWS tiles are served
+# from a single download of the public current-events document per cycle
+# (per-region RSS feeds are only read if that document is unavailable).
+AWS_HEALTH_URL = "https://health.aws.amazon.com/public/currentevents"
+AWS_LOGO = "https://upload.wikimedia.org/wikipedia/commons/9/93/Amazon_Web_Services_Logo.svg"
+AWS_REGIONS = ["us-east-1"]
+AWS_SERVICES = [("EC2", "ec2"), ("S3", "s3"), ("Lambda", "lambda")]
+
+STATUS_PROVIDERS = [
+    {"name": "GitHub", "adapter": "statuspage", "url": "https://www.githubstatus.com/api/v2/summary.json",
+     "link": "https://www.githubstatus.com", "logo": "https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png",
+     "components": GITHUB_WATCHLIST, "ok_status": "All Services Currently Operational"},
+    {"name": "Atlassian", "adapter": "statuspage", "link": "https://status.atlassian.com",
+     "logo": "https://cdn.worldvectorlogo.com/logos/atlassian.svg", "tag": [], "entries": 1,
+     "sources": [
+        {"name": "Jira Software", "url": "https://jira-software.status.atlassian.com/api/v2/summary.json"},
+        {"name": "Jira Service Management", "url": "https://jsm.status.atlassian.com/api/v2/summary.json"},
+        {"name": "Jira Work Management", "url": "https://jwm.status.atlassian.com/api/v2/summary.json"},
+        {"name": "Confluence", "url": "https://confluence.status.atlassian.com/api/v2/summary.json"},
+        {"name": "Atlassian Rovo", "url": "https://rovo.status.atlassian.com/api/v2/summary.json"}
+     ]},
+] + [
+    {"name": f"AWS {name}", "adapter": "aws_health", "url": AWS_HEALTH_URL, "service": slug, "regions": AWS_REGIONS,
+     "link": "https://health.aws.amazon.com", "logo": AWS_LOGO,
+     "tag": AWS_REGIONS[0].upper() if len(AWS_REGIONS) == 1 else f"{len(AWS_REGIONS)} REGIONS"}
+    for name, slug in AWS_SERVICES
+] + [
+    {"name": "Microsoft 365", "adapter": "rss", "url": "https://status.office.com/en-us/rss", "entries": 2,
+     "link": "https://status.office.com", "logo": "https://upload.wikimedia.org/wikipedia/commons/4/44/Microsoft_logo.svg",
+     "ok_status": "All Systems Operational"},
+    {"name": "Microsoft Teams", "adapter": "rss", "url": "https://status.office.com/en-us/rss", "entries": 2,
+     "link": "https://status.office.com", "logo": "https://upload.wikimedia.org/wikipedia/commons/c/c9/Microsoft_Office_Teams_%282018%E2%80%93present%29.svg",
+     "ok_status": "All Systems Operational"},
+    {"name": "Azure Status", "adapter": "rss", "url": "https://azurestatus.microsoft.com/en-us/status/feed/", "entries": 2,
+     "link": "https://status.office.com", "logo": "https://upload.wikimedia.org/wikipedia/commons/a/a8/Microsoft_Azure_Logo.svg",
+     "ok_status": "All Systems Operational"},
 ]
 
 # --- ON-CALL USER ---
@@ -75,10 +130,14 @@ ON_CALL_USER = {
 }
 
 # --- MAINTENANCE INFO ---
+# "start"/"end" are datetime objects. The banner only shows while the window is
+# upcoming or in progress; leave them as None to keep the tile green.
 MAINTENANCE_INFO = {
     "title": "Core Firewall Firmware Upgrade",
     "id": "CR-4402",
     "window_str": "Sat 10:00 PM - 2:00 AM CST",
+    "start": None,
+    "end": None,
     "status": "scheduled" 
 }
 
@@ -93,10 +152,3 @@ RAW_TICKETS = [
     {"id": "INC-1012", "summary": "Conf Room B AV Offline", "description": "HDMI switcher power cycle.", "status": "Pending", "assigned_to": "Jordan Smith", "time": "08:10"},
     {"id": "INC-1014", "summary": "MFA Loop on EntraID", "description": "Verification loop after reset.", "status": "Waiting for Support", "assigned_to": "Unassigned", "time": "07:30"}
 ]
-
-# --- MICROSOFT RSS TARGETS ---
-MS_RSS_TARGETS = [
-    {"name": "Microsoft 365", "url": "https://status.office.com/en-us/rss", "logo": "https://upload.wikimedia.org/wikipedia/commons/4/44/Microsoft_logo.svg"},
-    {"name": "Microsoft Teams", "url": "https://status.office.com/en-us/rss", "logo": "https://upload.wikimedia.org/wikipedia/commons/c/c9/Microsoft_Office_Teams_%282018%E2%80%93present%29.svg"},
-    {"name": "Azure Status", "url": "https://azurestatus.microsoft.com/en-us/status/feed/", "logo": "https://upload.wikimedia.org/wikipedia/commons/a/a8/Microsoft_Azure_Logo.svg"}
-]
\ No newline at end of file
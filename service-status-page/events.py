@@ -0,0 +1,165 @@
+"""
+Server-Sent Events push channel for status transitions.
+
+The refresher reports every published section here; diff_section() turns the
+old/new data into small events (tile status change, new feed entries,
+inventory count change) which are appended to a bounded in-memory log with
+monotonically increasing ids. A reconnecting client sends Last-Event-ID and
+receives just the events it missed, or a single 'resync' event when they
+have already been dropped from the log.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+# Events kept for Last-Event-ID replay.
+BACKLOG = 500
+# Comment line sent on idle streams so dead connections get noticed.
+HEARTBEAT = 15
+# Streams are closed after this long; clients reconnect with Last-Event-ID,
+# which recycles the server thread behind long-lived connections.
+MAX_AGE = 600
+# Client reconnect delay (ms) advertised in the stream.
+RETRY_MS = 3000
+
+
+class EventBus:
+    """Append-only, bounded event log that SSE streams block on."""
+
+    def __init__(self, backlog=BACKLOG):
+        self._log = deque(maxlen=backlog)
+        self._cond = threading.Condition()
+        # Ids start at the boot time in ms so they keep increasing across
+        # restarts and a stale Last-Event-ID never looks like a future one.
+        self._last_id = int(time.time() * 1000)
+        self.clients = 0
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def connect(self):
+        with self._cond:
+            self.clients += 1
+
+    def disconnect(self):
+        with self._cond:
+            self.clients -= 1
+
+    def publish(self, event, data):
+        """Appends an event and wakes every waiting stream. Returns its id."""
+        body = json.dumps(data, separators=(",", ":"), default=str)
+        with self._cond:
+            self._last_id += 1
+            self._log.append((self._last_id, event, body))
+            self._cond.notify_all()
+            return self._last_id
+
+    def since(self, last_id):
+        """
+        Events newer than last_id, or None if some of them were already
+        evicted (or last_id is unknown) and the client must resync.
+        """
+        with self._cond:
+            return self._since(last_id)
+
+    def wait(self, last_id, timeout):
+        """Blocks until an event newer than last_id arrives or timeout."""
+        with self._cond:
+            if self._last_id <= last_id:
+                self._cond.wait(timeout)
+            return self._since(last_id)
+
+    def _since(self, last_id):
+        if last_id > self._last_id:
+            return None
+        if last_id == self._last_id:
+            return []
+        if not self._log or self._log[0][0] > last_id + 1:
+            return None
+        return [e for e in self._log if e[0] > last_id]
+
+
+def _format(event_id, event, body):
+    return f"id: {event_id}\nevent: {event}\ndata: {body}\n\n"
+
+
+def stream(bus, last_id=None, heartbeat=HEARTBEAT, max_age=MAX_AGE):
+    """Generator of SSE frames for one client connection."""
+    deadline = time.monotonic() + max_age
+    bus.connect()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if last_id is None:
+            last_id = bus.last_id
+        else:
+            missed = bus.since(last_id)
+            if missed is None:
+                last_id = bus.last_id
+                yield _format(last_id, "resync", "{}")
+            else:
+                for event_id, event, body in missed:
+                    last_id = event_id
+                    yield _format(event_id, event, body)
+
+        while time.monotonic() < deadline:
+            events = bus.wait(last_id, heartbeat)
+            if events is None:
+                last_id = bus.last_id
+                yield _format(last_id, "resync", "{}")
+            elif not events:
+                yield ": ping\n\n"
+            for event_id, event, body in events or []:
+                last_id = event_id
+                yield _format(event_id, event, body)
+    finally:
+        bus.disconnect()
+
+
+def _by_name(items):
+    return {item.get("name"): item for item in items or [] if isinstance(item, dict)}
+
+
+def diff_section(name, old, new):
+    """
+    Turns a section change into (event, data) pairs. Only transitions are
+    reported; other sections just announce their new version.
+    """
+    if old == new:
+        return []
+    if name == "services":
+        return _diff_services(old, new)
+    if name == "inventory":
+        return _diff_inventory(old, new)
+    return [("section", {"section": name})]
+
+
+def _diff_services(old, new):
+    before, after = _by_name(old), _by_name(new)
+    if set(before) != set(after):
+        return [("section", {"section": "services"})]
+
+    events = []
+    for name, tile in after.items():
+        prev = before[name]
+        if (prev.get("class"), prev.get("status")) != (tile.get("class"), tile.get("status")):
+            events.append(("tile", {"name": name, "from": prev.get("class"), "tile": tile}))
+            continue
+        # Feed times can be regenerated on every fetch, so entries are keyed by text.
+        seen = {m.get("text") for m in prev.get("feed") or []}
+        fresh = [m for m in tile.get("feed") or [] if m.get("text") not in seen]
+        if fresh:
+            events.append(("feed", {"name": name, "entries": fresh, "tile": tile}))
+    return events
+
+
+def _diff_inventory(old, new):
+    before, after = _by_name(old), _by_name(new)
+    if set(before) != set(after):
+        return [("section", {"section": "inventory"})]
+    return [
+        ("inventory", {"name": name, "from": before[name].get("count"), "item": item})
+        for name, item in after.items()
+        if (before[name].get("count"), before[name].get("class")) != (item.get("count"), item.get("class"))
+    ]
@@ -0,0 +1,179 @@
+"""
+Shared HTTP fetch layer for status APIs and RSS feeds.
+
+* One keep-alive requests.Session per host, so repeated polls reuse the
+  TCP/TLS connection instead of handshaking on every fetch.
+* Conditional GETs: the last ETag / Last-Modified of every URL is replayed and
+  a 304 answer short-circuits to the previously parsed result.
+* Per-cycle de-duplication: within one refresh cycle (see begin_cycle) an URL
+  is downloaded and parsed at most once, even when several tiles share it.
+  A failure is remembered for the cycle too, so the callers queued behind a
+  hung or broken download get its error at once instead of retrying it.
+
+Every request sent through these sessions is timed and counted in metrics.py
+(latency, bytes, errors and timeouts per upstream host).
+
+requests is imported on first use rather than with this module, so a cold
+process can serve its restored snapshot before the HTTP stack has loaded.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+from feeds import parse_feed
+from metrics import FETCH_CACHE, UPSTREAM_BYTES, UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+# Max concurrent keep-alive connections held open per host.
+POOL_SIZE = 10
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+_entries = {}
+_entries_lock = threading.Lock()
+_cycle = 0
+
+
+class _Entry:
+    """Validators, last parsed body and this cycle's outcome for one URL."""
+
+    __slots__ = ("lock", "etag", "last_modified", "parsed", "error", "cycle")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.etag = None
+        self.last_modified = None
+        self.parsed = None
+        self.error = None  # Exception raised by this cycle's attempt, if it failed
+        self.cycle = 0
+
+
+class _MeteredAdapter:
+    """Connection-pooling adapter (wraps requests' HTTPAdapter) that records metrics."""
+
+    def __init__(self, **pool):
+        from requests.adapters import HTTPAdapter
+        self._http = HTTPAdapter(**pool)
+
+    def close(self):
+        self._http.close()
+
+    def send(self, request, **kwargs):
+        import requests
+        host = urlsplit(request.url).netloc
+        started = time.perf_counter()
+        try:
+            resp = self._http.send(request, **kwargs)
+            # Session.send would read the body right after us anyway; doing
+            # it here lets the latency and byte counts include the download.
+            size = 0 if kwargs.get("stream") else len(resp.content)
+        except requests.exceptions.Timeout:
+            UPSTREAM_ERRORS.inc(host=host, reason="timeout")
+            raise
+        except requests.exceptions.RequestException:
+            UPSTREAM_ERRORS.inc(host=host, reason="connection")
+            raise
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, host=host)
+        UPSTREAM_BYTES.inc(size, host=host)
+        if resp.status_code >= 400:
+            UPSTREAM_ERRORS.inc(host=host, reason=f"http_{resp.status_code}")
+        return resp
+
+
+def session_for(url):
+    """Returns the pooled keep-alive Session for the URL's host."""
+    host = urlsplit(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            import requests
+            session = requests.Session()
+            adapter = _MeteredAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+    return session
+
+
+def begin_cycle():
+    """
+    Starts a new refresh cycle. Until the next call, each URL is fetched at
+    most once and later callers share the parsed result.
+    """
+    global _cycle
+    with _entries_lock:
+        _cycle += 1
+        return _cycle
+
+
+def _entry(url):
+    with _entries_lock:
+        entry = _entries.get(url)
+        if entry is None:
+            entry = _entries[url] = _Entry()
+    return entry
+
+
+def _replay(error):
+    """
+    A fresh copy of a cached error (with its attributes, e.g. .response),
+    so callers on other threads don't keep growing one shared traceback.
+    """
+    try:
+        copy = type(error)(*error.args)
+    except Exception:
+        copy = RuntimeError(str(error))
+    copy.__dict__.update(error.__dict__)
+    return copy
+
+
+def fetch(url, parse, timeout=5):
+    """
+    GETs an URL through the shared layer and returns parse(response).
+    The parsed object is shared between callers and must not be mutated.
+    Raises the same error to every caller in a cycle whose attempt failed.
+    """
+    entry = _entry(url)
+    # The per-URL lock makes concurrent callers for the same URL wait for
+    # one download instead of racing to issue their own.
+    with entry.lock:
+        if _cycle and entry.cycle == _cycle:
+            if entry.error is not None:
+                FETCH_CACHE.inc(result="error")
+                raise _replay(entry.error) from entry.error
+            if entry.parsed is not None:
+                FETCH_CACHE.inc(result="hit")
+                return entry.parsed
+
+        headers = {}
+        if entry.etag: headers["If-None-Match"] = entry.etag
+        if entry.last_modified: headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            resp = session_for(url).get(url, headers=headers, timeout=timeout)
+            if resp.status_code == 304 and entry.parsed is not None:
+                FETCH_CACHE.inc(result="not_modified")
+                parsed = entry.parsed
+            else:
+                resp.raise_for_status()
+                FETCH_CACHE.inc(result="miss")
+                parsed = parse(resp)
+                entry.etag = resp.headers.get("ETag")
+                entry.last_modified = resp.headers.get("Last-Modified")
+        except Exception as e:
+            entry.error, entry.cycle = e, _cycle
+            raise
+
+        entry.parsed, entry.error, entry.cycle = parsed, None, _cycle
+        return parsed
+
+
+def fetch_json(url, timeout=3):
+    """Decoded JSON body of an URL (e.g. a Statuspage summary.json)."""
+    return fetch(url, lambda resp: resp.json(), timeout)
+
+
+def fetch_feed(url, timeout=5):
+    """Newest entries of an RSS/Atom URL (see feeds.parse_feed)."""
+    return fetch(url, lambda resp: parse_feed(resp.content), timeout)
@@ -0,0 +1,248 @@
+"""
+Persistent status history (SQLite).
+
+Only transitions are written: a row (ts, provider id, class code, incident
+reference cut to INCIDENT_MAX characters) is appended when a provider's
+class or incident changes, so the write cost per refresh is one dictionary lookup and, rarely, one indexed INSERT, no
+matter how much history has accumulated.
+
+rollup() periodically folds completed hours into per-class seconds
+(`rollups`, span=3600) and completed days into span=86400 rows; compact()
+drops raw rows and rollups past their retention. Uptime over 24h/7d/30d is
+then at most ~720 hourly rows plus the raw transitions at either edge of
+the window.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+HOUR, DAY = 3600, 86400
+
+# Class codes stored in the table; their position is the code.
+CLASSES = ("good", "warning", "critical", "unknown")
+WINDOWS = {"24h": DAY, "7d": 7 * DAY, "30d": 30 * DAY}
+
+# Retention (seconds). Raw transitions and hourly rollups must outlive the
+# longest uptime window.
+RAW_RETENTION = 35 * DAY
+HOURLY_RETENTION = 35 * DAY
+DAILY_RETENTION = 400 * DAY
+
+# Incident references (ids, links, titles) are cut to this many characters
+# so transition rows stay small.
+INCIDENT_MAX = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS providers (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS transitions (
+    ts INTEGER NOT NULL, provider INTEGER NOT NULL, class INTEGER NOT NULL, incident TEXT
+);
+CREATE INDEX IF NOT EXISTS transitions_by_provider ON transitions (provider, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    span INTEGER NOT NULL, provider INTEGER NOT NULL, bucket INTEGER NOT NULL,
+    good INTEGER NOT NULL, warning INTEGER NOT NULL, critical INTEGER NOT NULL, unknown INTEGER NOT NULL,
+    PRIMARY KEY (span, provider, bucket)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def _floor(ts, span):
+    return ts - ts % span
+
+
+def _ceil(ts, span):
+    return _floor(ts + span - 1, span)
+
+
+class HistoryStore:
+    """Append-only transition log with hourly/daily rollups."""
+
+    def __init__(self, path):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._ids = dict(self._conn.execute("SELECT name, id FROM providers"))
+            # Latest (class, incident) per provider id, to detect transitions.
+            self._last = {
+                pid: (cls, incident) for pid, cls, incident in self._conn.execute(
+                    "SELECT provider, class, incident FROM transitions t WHERE ts = "
+                    "(SELECT max(ts) FROM transitions WHERE provider = t.provider)"
+                )
+            }
+
+    def _provider_id(self, name):
+        pid = self._ids.get(name)
+        if pid is None:
+            self._conn.execute("INSERT OR IGNORE INTO providers (name) VALUES (?)", (name,))
+            pid = self._ids[name] = self._conn.execute("SELECT id FROM providers WHERE name = ?", (name,)).fetchone()[0]
+        return pid
+
+    def record(self, name, cls, incident=None, ts=None):
+        """Stores a result if it differs from the provider's last one. Returns True if written."""
+        code = CLASSES.index(cls) if cls in CLASSES else CLASSES.index("unknown")
+        incident = str(incident)[:INCIDENT_MAX] if incident is not None else None
+        with self._lock:
+            pid = self._provider_id(name)
+            if self._last.get(pid) == (code, incident):
+                return False
+            self._conn.execute(
+                "INSERT INTO transitions (ts, provider, class, incident) VALUES (?, ?, ?, ?)",
+                (int(ts or time.time()), pid, code, incident)
+            )
+            self._last[pid] = (code, incident)
+            return True
+
+    # --- Queries (callers hold the lock) ---
+
+    def _meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _raw_seconds(self, pid, start, end):
+        """Seconds per class code in [start, end) from the transition log."""
+        totals = [0] * len(CLASSES)
+        if end <= start:
+            return totals
+        row = self._conn.execute(
+            "SELECT class FROM transitions WHERE provider = ? AND ts <= ? ORDER BY ts DESC LIMIT 1", (pid, start)
+        ).fetchone()
+        at, code = start, row[0] if row else None
+        for ts, next_code in self._conn.execute(
+            "SELECT ts, class FROM transitions WHERE provider = ? AND ts > ? AND ts < ? ORDER BY ts", (pid, start, end)
+        ):
+            if code is not None:
+                totals[code] += ts - at
+            at, code = ts, next_code
+        if code is not None:
+            totals[code] += end - at
+        return totals
+
+    def _seconds(self, pid, start, end):
+        """Seconds per class code in [start, end), using hourly rollups where available."""
+        rolled = self._meta("hourly", 0)
+        lo, hi = _ceil(start, HOUR), min(rolled, _floor(end, HOUR))
+        if hi <= lo:
+            return self._raw_seconds(pid, start, end)
+        totals = self._raw_seconds(pid, start, lo)
+        row = self._conn.execute(
+            "SELECT sum(good), sum(warning), sum(critical), sum(unknown) FROM rollups "
+            "WHERE span = ? AND provider = ? AND bucket >= ? AND bucket < ?", (HOUR, pid, lo, hi)
+        ).fetchone()
+        totals = [a + (b or 0) for a, b in zip(totals, row)]
+        return [a + b for a, b in zip(totals, self._raw_seconds(pid, hi, end))]
+
+    # --- Public API ---
+
+    def uptime(self, name, window, now=None):
+        """
+        Share of observed time per class over the last `window` seconds.
+        'uptime' counts everything short of an outage (good + warning);
+        time spent 'unknown' is excluded from the denominator.
+        """
+        now = int(now or time.time())
+        with self._lock:
+            pid = self._ids.get(name)
+            totals = self._seconds(pid, now - window, now) if pid else [0] * len(CLASSES)
+        observed = sum(totals[:3])
+        if not observed:
+            return {"uptime": None, "observed": 0}
+        result = {cls: round(100.0 * totals[i] / observed, 3) for i, cls in enumerate(CLASSES[:3])}
+        result.update(uptime=round(100.0 * (totals[0] + totals[1]) / observed, 3), observed=observed)
+        return result
+
+    def summary(self, now=None):
+        """Current class and 24h/7d/30d uptime for every known provider."""
+        now = int(now or time.time())
+        with self._lock:
+            names = dict((pid, name) for name, pid in self._ids.items())
+            current = {names[pid]: CLASSES[code] for pid, (code, _) in self._last.items() if pid in names}
+        return {
+            name: dict({label: self.uptime(name, span, now) for label, span in WINDOWS.items()}, current=current.get(name))
+            for name in sorted(names.values())
+        }
+
+    def series(self, name, span, count, now=None):
+        """Last `count` completed rollup buckets of `span` (HOUR or DAY) for a provider."""
+        now = int(now or time.time())
+        end = _floor(now, span)
+        start = end - count * span
+        with self._lock:
+            pid = self._ids.get(name)
+            rows = self._conn.execute(
+                "SELECT bucket, good, warning, critical, unknown FROM rollups "
+                "WHERE span = ? AND provider = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+                (span, pid, start, end)
+            ).fetchall() if pid else []
+        return [dict(zip(("bucket",) + CLASSES, row)) for row in rows]
+
+    def transitions(self, name, limit=20):
+        """Most recent transitions for a provider, newest first."""
+        with self._lock:
+            pid = self._ids.get(name)
+            rows = self._conn.execute(
+                "SELECT ts, class, incident FROM transitions WHERE provider = ? ORDER BY ts DESC LIMIT ?", (pid, limit)
+            ).fetchall() if pid else []
+        return [{"ts": ts, "class": CLASSES[code], "incident": incident} for ts, code, incident in rows]
+
+    def rollup(self, now=None):
+        """Folds every completed hour (and day) since the last call into rollups."""
+        now = int(now or time.time())
+        with self._lock:
+            first = self._conn.execute("SELECT min(ts) FROM transitions").fetchone()[0]
+            if first is None:
+                return
+            done = _floor(now, HOUR)
+            mark = max(self._meta("hourly", _floor(first, HOUR)), done - HOURLY_RETENTION)
+            self._conn.execute("BEGIN")
+            try:
+                for bucket in range(mark, done, HOUR):
+                    for pid in self._ids.values():
+                        totals = self._raw_seconds(pid, bucket, bucket + HOUR)
+                        if any(totals):
+                            self._conn.execute(
+                                "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?)", (HOUR, pid, bucket, *totals)
+                            )
+                self._set_meta("hourly", max(mark, done))
+
+                day_done = _floor(done, DAY)
+                day_mark = max(self._meta("daily", _floor(mark, DAY)), day_done - DAILY_RETENTION)
+                for day in range(day_mark, day_done, DAY):
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO rollups SELECT ?, provider, ?, sum(good), sum(warning), sum(critical), sum(unknown) "
+                        "FROM rollups WHERE span = ? AND bucket >= ? AND bucket < ? GROUP BY provider",
+                        (DAY, day, HOUR, day, day + DAY)
+                    )
+                self._set_meta("daily", max(day_mark, day_done))
+                self._conn.execute("COMMIT")
+            except Exception:
+                # Autocommit connection: an open transaction would swallow every later write.
+                if self._conn.in_transaction: self._conn.execute("ROLLBACK")
+                raise
+
+    def compact(self, now=None):
+        """Drops rows past retention, keeping each provider's last state before the cut."""
+        now = int(now or time.time())
+        with self._lock:
+            cut = now - RAW_RETENTION
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM transitions WHERE ts < ? AND rowid NOT IN "
+                    "(SELECT max(rowid) FROM transitions WHERE ts < ? GROUP BY provider)", (cut, cut)
+                )
+                self._conn.execute("DELETE FROM rollups WHERE span = ? AND bucket < ?", (HOUR, now - HOURLY_RETENTION))
+                self._conn.execute("DELETE FROM rollups WHERE span = ? AND bucket < ?", (DAY, now - DAILY_RETENTION))
+                self._conn.execute("COMMIT")
+            except Exception:
+                if self._conn.in_transaction: self._conn.execute("ROLLBACK")
+                raise
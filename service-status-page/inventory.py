@@ -0,0 +1,92 @@
+"""
+Data-driven hardware classification for the inventory tiles.
+
+Each INVENTORY_WATCHLIST entry may carry a "match" rule:
+
+    "match": {
+        "source": "intune",       # 'jamf' or 'intune'
+        "model_prefix": "HP",     # optional, pushed server-side as a filter
+        "model": r"g11",          # regex, case-insensitive, searched in the model
+        "ram_gb": [14, 18],       # optional inclusive bin
+        "storage_gb": [450, 520], # optional inclusive bin
+    }
+
+Rules are compiled once per source into a single alternation regex. The list
+of candidate rules for a model string is resolved once and memoised, so
+classifying a device is one dict lookup plus a bin check no matter how many
+SKUs are tracked. The first matching rule (watchlist order) wins.
+"""
+import re
+from collections import namedtuple
+
+Rule = namedtuple("Rule", ["name", "ram_gb", "storage_gb"])
+
+# Normalised device passed to Classifier: RAM/storage already in GB.
+Device = namedtuple("Device", ["model", "ram_gb", "storage_gb"])
+
+
+def _in_bin(value, bounds):
+    return bounds is None or (value is not None and bounds[0] <= value <= bounds[1])
+
+
+class Classifier:
+    """Compiled matcher for every watchlist rule of one source platform."""
+
+    def __init__(self, watchlist, source):
+        self.source = source
+        self.names = []
+        self.prefixes = []
+        patterns = []
+        self._rules = []  # (pattern index, Rule) in watchlist order
+
+        for item in watchlist:
+            match = item.get("match") or {}
+            if match.get("source") != source:
+                continue
+            pattern = match.get("model", "")
+            if pattern not in patterns:
+                patterns.append(pattern)
+            self._rules.append((patterns.index(pattern), Rule(item["name"], match.get("ram_gb"), match.get("storage_gb"))))
+            self.names.append(item["name"])
+            self.prefixes.append(match.get("model_prefix"))
+
+        self._combined = re.compile("|".join(f"(?:{p})" for p in patterns), re.I) if patterns else None
+        self._patterns = [re.compile(p, re.I) for p in patterns]
+        self._candidates = {}
+
+    def server_prefixes(self):
+        """
+        Distinct model prefixes to filter on server-side, or None when any
+        rule lacks one (the full fleet must then be fetched).
+        """
+        if not self.prefixes or None in self.prefixes:
+            return None
+        return list(dict.fromkeys(self.prefixes))
+
+    def candidates(self, model):
+        """Rules whose model pattern matches, resolved once per distinct model."""
+        found = self._candidates.get(model)
+        if found is None:
+            found = ()
+            if self._combined and self._combined.search(model):
+                hits = {i for i, p in enumerate(self._patterns) if p.search(model)}
+                found = tuple(rule for i, rule in self._rules if i in hits)
+            self._candidates[model] = found
+        return found
+
+    def classify(self, device):
+        """Watchlist name for a Device, or None if it matches no rule."""
+        for rule in self.candidates(device.model or ""):
+            if _in_bin(device.ram_gb, rule.ram_gb) and _in_bin(device.storage_gb, rule.storage_gb):
+                return rule.name
+        return None
+
+    def count(self, devices):
+        """Batch-classifies an iterable of Devices into {name: count}."""
+        counts = dict.fromkeys(self.names, 0)
+        classify = self.classify
+        for device in devices:
+            name = classify(device)
+            if name is not None:
+                counts[name] += 1
+        return counts
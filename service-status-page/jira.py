@@ -0,0 +1,141 @@
+"""
+Live Jira ticket feed with incremental sync.
+
+The first sync pages through the newest INDEX_SIZE issues matching the
+configured JQL. Every later sync only asks for issues updated since the
+previous one (`updated >= -<n>m`, with a small overlap for clock skew and
+JQL's minute granularity) and merges them into an in-memory index keyed by
+issue id. Only the fields the sidebar renders are requested, so a refresh
+costs one small delta query however large the queue is. Delta queries
+also match indexed issues that have gone Done, and any issue whose status
+category is Done is dropped from the index, so resolved tickets leave the
+sidebar whether or not the JQL excludes them.
+
+The configured JQL must not carry its own ORDER BY (config.validate
+rejects one); the index appends it.
+
+Relative JQL dates are used instead of absolute timestamps because Jira
+interprets absolute ones in the API user's profile timezone.
+"""
+import math
+import threading
+import time
+from datetime import datetime
+
+from feeds import parse_date
+from fetch import session_for
+from mdm import MAX_RETRIES, retry_delay
+
+SEARCH_PATH = "/rest/api/3/search/jql"
+# Only what the ticket sidebar renders.
+FIELDS = "summary,status,assignee,updated"
+PAGE_SIZE = 100
+# Issues kept in the index (most recently updated win).
+INDEX_SIZE = 500
+OVERLAP_MINUTES = 2
+# status.statusCategory.key of resolved issues.
+DONE_CATEGORY = "done"
+
+
+def is_done(fields):
+    """True once an issue's status sits in Jira's Done category."""
+    return ((fields.get("status") or {}).get("statusCategory") or {}).get("key") == DONE_CATEGORY
+
+
+def ticket_time(updated, now=None):
+    """'HH:MM' for issues updated today, 'Mon DD' otherwise (the sidebar format)."""
+    if updated is None:
+        return "--:--"
+    local, now = updated.astimezone(), (now or datetime.now().astimezone())
+    return local.strftime("%H:%M") if local.date() == now.date() else local.strftime("%b %d")
+
+
+class JiraIndex:
+    """Issues matching `jql`, kept current with delta queries."""
+
+    def __init__(self, domain, email, token, jql, index_size=INDEX_SIZE, timeout=10):
+        self.url = f"https://{domain}{SEARCH_PATH}"
+        self.auth = (email, token)
+        self.jql = jql
+        self.index_size = index_size
+        self.timeout = timeout
+        self.cursor = None  # time.time() at the start of the last successful sync
+        self._issues = {}   # issue id -> (updated datetime, fields dict)
+        self._lock = threading.Lock()
+
+    def _get(self, params):
+        for attempt in range(MAX_RETRIES + 1):
+            resp = session_for(self.url).get(
+                self.url, params=params, auth=self.auth,
+                headers={"Accept": "application/json"}, timeout=self.timeout
+            )
+            if resp.status_code not in (429, 503) or attempt == MAX_RETRIES:
+                resp.raise_for_status()
+                return resp.json()
+            time.sleep(retry_delay(resp, attempt))
+
+    def _search(self, jql, limit):
+        """Yields up to `limit` issues, following nextPageToken."""
+        params = {"jql": jql, "fields": FIELDS, "maxResults": min(PAGE_SIZE, limit)}
+        seen = 0
+        while True:
+            body = self._get(params)
+            for issue in body.get("issues", []):
+                yield issue
+                seen += 1
+                if seen >= limit:
+                    return
+            token = body.get("nextPageToken")
+            if body.get("isLast") or not token:
+                return
+            params["nextPageToken"] = token
+
+    def sync(self):
+        """Initial load on first call, delta query afterwards. Returns issues merged or dropped."""
+        started = time.time()
+        if self.cursor is None:
+            jql = f"{self.jql} ORDER BY updated DESC"
+        else:
+            minutes = math.ceil((started - self.cursor) / 60) + OVERLAP_MINUTES
+            with self._lock:
+                held = ", ".join(sorted(self._issues, key=int))
+            # Indexed issues that went Done are asked for too: a JQL that
+            # excludes them would otherwise hide the transition that evicts them.
+            scope = f"({self.jql}) OR (id in ({held}) AND statusCategory = Done)" if held else f"({self.jql})"
+            jql = f"({scope}) AND updated >= -{minutes}m ORDER BY updated DESC"
+
+        updates, done = {}, set()
+        for issue in self._search(jql, self.index_size):
+            fields = issue.get("fields") or {}
+            if is_done(fields):
+                done.add(issue["id"])
+            else:
+                updates[issue["id"]] = (parse_date(fields.get("updated")), dict(fields, key=issue.get("key")))
+
+        with self._lock:
+            self._issues.update(updates)
+            for issue_id in done:
+                self._issues.pop(issue_id, None)
+            if len(self._issues) > self.index_size:
+                newest = sorted(self._issues.items(), key=self._order, reverse=True)[:self.index_size]
+                self._issues = dict(newest)
+            self.cursor = started
+        return len(updates) + len(done)
+
+    @staticmethod
+    def _order(item):
+        updated = item[1][0]
+        return updated.timestamp() if updated else 0
+
+    def tickets(self, limit=None):
+        """Sidebar dicts for the most recently updated issues."""
+        with self._lock:
+            items = sorted(self._issues.items(), key=self._order, reverse=True)[:limit]
+        now = datetime.now().astimezone()
+        return [{
+            "id": fields.get("key"),
+            "summary": fields.get("summary") or "",
+            "status": (fields.get("status") or {}).get("name", "Unknown"),
+            "assigned_to": (fields.get("assignee") or {}).get("displayName", "Unassigned"),
+            "time": ticket_time(updated, now),
+        } for _, (updated, fields) in items]
@@ -1,61 +1,166 @@
-import requests
-import feedparser
+"""
+Terminal status dashboard.
+
+Polls the providers configured in data.STATUS_PROVIDERS through the same
+collector layer as the web app (providers.collect_tiles), so tiles, parsing
+rules, breakers and per-source cadence are identical in both. Sources are
+fetched concurrently under one deadline.
+
+    python main.py                  live table; only rows that changed are redrawn
+    python main.py --once           print the table once and exit
+    python main.py --once --json    one JSON document (cron, scripts)
+    python main.py --json           NDJSON stream: one line per tile change
+
+With --once the exit status follows the Nagios convention: 0 all operational,
+1 warning, 2 critical, 3 unknown. The status is decided at --deadline; queued
+fetches are then cancelled, but one already in flight still holds the process
+open until its own request timeout (a provider's "timeout", 5s by default).
+"""
+import argparse
+import contextlib
+import json
+import shutil
+import sys
 import time
-from datetime import datetime
-
-def get_json_status(name, url):
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        indicator = data['status']['indicator']
-        status = "✅ OPERATIONAL" if indicator == "none" else "⚠️ ISSUES"
-        return {"service": name, "status": status, "message": data['status']['description']}
-    except Exception as e:
-        return {"service": name, "status": "❌ ERROR", "message": "API Unreachable"}
-
-def get_aws_rss_status(service_slug):
-    url = f"https://status.aws.amazon.com/rss/{service_slug}-us-east-1.rss"
-    try:
-        feed = feedparser.parse(url)
-        if not feed.entries:
-            return {"service": f"AWS {service_slug.upper()}", "status": "✅ OPERATIONAL", "message": "Normal"}
-        
-        latest = feed.entries[0]
-        status = "✅ OPERATIONAL" if "operating normally" in latest.title.lower() else "⚠️ ISSUES"
-        return {"service": f"AWS {service_slug.upper()}", "status": status, "message": latest.title}
-    except Exception as e:
-        return {"service": f"AWS {service_slug.upper()}", "status": "❌ ERROR", "message": "RSS Unreachable"}
-
-def run_dashboard():
-    # Clear terminal (optional, works for Windows)
-    import os
-    os.system('cls' if os.name == 'nt' else 'clear')
-
-    print(f"--- SERVICE HEALTH DASHBOARD | Last Updated: {datetime.now().strftime('%H:%M:%S')} ---")
-    print(f"{'SERVICE':<18} | {'STATUS':<15} | {'DETAIL'}")
-    print("-" * 70)
-
-    # Combined target list
-    results = []
-    
-    # JSON Targets
-    results.append(get_json_status("GitHub", "https://www.githubstatus.com/api/v2/summary.json"))
-    results.append(get_json_status("Atlassian", "https://status.atlassian.com/api/v2/summary.json"))
-    
-    # AWS Targets
-    for svc in ["ec2", "s3", "lambda"]:
-        results.append(get_aws_rss_status(svc))
-
-    for item in results:
-        print(f"{item['service']:<18} | {item['status']:<15} | {item['message']}")
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from breaker import POLL_FAST, POLL_NORMAL
+from data import STATUS_PROVIDERS
+from providers import collect_tiles, load_providers
+
+LABELS = {"good": "✅ OPERATIONAL", "warning": "⚠️ ISSUES", "critical": "❌ OUTAGE", "unknown": "❔ UNKNOWN"}
+# Checked in this order: the first class present decides the exit status.
+EXIT_CODES = (("critical", 2), ("warning", 1), ("unknown", 3))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IT service status in the terminal.")
+    parser.add_argument("--once", action="store_true", help="poll once, print and exit")
+    parser.add_argument("--json", action="store_true",
+                        help="JSON output: one document with --once, otherwise an NDJSON stream of changes")
+    parser.add_argument("--interval", type=int, default=POLL_NORMAL,
+                        help=f"seconds between polls for sources without their own interval (default {POLL_NORMAL})")
+    parser.add_argument("--deadline", type=float, default=6,
+                        help="seconds to wait for all sources per poll (default 6)")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent fetches (default 16)")
+    parser.add_argument("--only", action="append", metavar="NAME", help="show only this provider (repeatable)")
+    return parser.parse_args(argv)
+
+
+def record(tile):
+    """A tile as emitted in JSON output (the web tile minus its logo)."""
+    return {
+        "name": tile["name"], "class": tile["class"], "status": tile["status"],
+        "incident": tile.get("incident"), "stale": bool(tile.get("stale")),
+        "tags": tile["tag"] if isinstance(tile["tag"], list) else [tile["tag"]],
+        "url": tile["url"], "feed": tile["feed"],
+    }
+
+
+def exit_code(tiles):
+    classes = {tile["class"] for tile in tiles}
+    return next((code for cls, code in EXIT_CODES if cls in classes), 0)
+
+
+def row(tile, width):
+    detail = tile["feed"][0]["text"] if tile["feed"] else tile["status"]
+    if tile.get("stale") and tile["class"] != "unknown":
+        detail = f"(stale) {detail}"
+    line = f"{tile['name']:<18} | {LABELS.get(tile['class'], tile['class']):<15} | {detail}"
+    return line[:width]
+
+
+def table(tiles, width):
+    """Header, rule and one row per tile."""
+    return [
+        f"--- SERVICE HEALTH DASHBOARD | Last Updated: {datetime.now().strftime('%H:%M:%S')} ---"[:width],
+        f"{'SERVICE':<18} | {'STATUS':<15} | DETAIL"[:width],
+        "-" * min(70, width),
+    ] + [row(tile, width) for tile in tiles]
+
+
+class Screen:
+    """Terminal table redrawn in place: only lines whose text changed are rewritten."""
+
+    def __init__(self, out):
+        self.out = out
+        self.lines = []
+
+    def draw(self, lines):
+        if len(lines) != len(self.lines):
+            self.out.write("\x1b[2J\x1b[H" + "\n".join(lines) + "\n")
+        else:
+            for i, (old, new) in enumerate(zip(self.lines, lines)):
+                if old != new:
+                    self.out.write(f"\x1b[{i + 1};1H\x1b[2K{new}")
+            self.out.write(f"\x1b[{len(lines) + 1};1H")
+        self.out.flush()
+        self.lines = lines
+
+
+def run(opts, out):
+    providers = load_providers(STATUS_PROVIDERS)
+    if opts.only:
+        wanted = {name.lower() for name in opts.only}
+        providers = [p for p in providers if p.name.lower() in wanted]
+        if not providers:
+            raise SystemExit(f"no provider named {', '.join(opts.only)}")
+    for provider in providers:
+        provider.interval = provider.interval or opts.interval
+
+    pool = ThreadPoolExecutor(max_workers=opts.workers, thread_name_prefix="health")
+    poll = lambda: collect_tiles(providers, pool, time.monotonic() + opts.deadline)
+    width = shutil.get_terminal_size().columns
+
+    if opts.once:
+        tiles = poll()
+        if opts.json:
+            json.dump({"updated": datetime.now(timezone.utc).isoformat(), "services": [record(t) for t in tiles]}, out, indent=2)
+            out.write("\n")
+        else:
+            out.write("\n".join(table(tiles, width)) + "\n")
+        # Queued jobs are dropped; running ones cannot be interrupted and end
+        # within their request timeout (the interpreter joins pool threads).
+        pool.shutdown(wait=False, cancel_futures=True)
+        return exit_code(tiles)
+
+    # Wake at least every POLL_FAST so sources with an active incident are
+    # re-polled at their faster cadence; sources that are not due are served
+    # from memory and cost nothing.
+    tick = min(opts.interval, POLL_FAST)
+    screen = Screen(out) if out.isatty() and not opts.json else None
+    last = {}
+    while True:
+        tiles = poll()
+        if screen:
+            screen.draw(table(tiles, width) + ["", f"Polling every {opts.interval}s... (Press Ctrl+C to stop)"])
+        else:
+            stamp = datetime.now(timezone.utc).isoformat()
+            for tile in tiles:
+                current = record(tile)
+                if last.get(tile["name"]) == current:
+                    continue
+                last[tile["name"]] = current
+                out.write((json.dumps(dict(current, ts=stamp)) if opts.json else f"{stamp} {row(tile, width)}") + "\n")
+            out.flush()
+        time.sleep(tick)
+
+
+def main(argv=None):
+    opts = parse_args(argv)
+    out = sys.stdout
+    # Collectors log errors with print(); keep that on stderr so the table
+    # and JSON output on stdout stay clean.
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            return run(opts, out)
+        except KeyboardInterrupt:
+            if not opts.json:
+                out.write("\nDashboard stopped by user.\n")
+            return 0
+
 
 # --- MAIN LOOP ---
 if __name__ == "__main__":
-    try:
-        while True:
-            run_dashboard()
-            print("\nUpdating in 5 minutes... (Press Ctrl+C to stop)")
-            time.sleep(300) # Wait 300 seconds
-    except KeyboardInterrupt:
-        print("\nDashboard stopped by user.")
\ No newline at end of file
+    sys.exit(main())
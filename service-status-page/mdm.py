@@ -0,0 +1,147 @@
+"""
+Streaming pagers for MDM inventory APIs (Microsoft Graph / Intune, Jamf Pro).
+
+Devices are yielded one at a time as pages arrive so callers can aggregate
+counts on the fly; at most a few pages are held in memory regardless of fleet
+size. Throttling answers (429/503) are retried after the provider's
+Retry-After (capped at MAX_RETRY_AFTER), falling back to exponential
+back-off, unless the wait would run past the caller's deadline.
+"""
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from tokens import authorized_get
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+# Longest Retry-After honoured; larger values are treated as this.
+MAX_RETRY_AFTER = 60
+# Max pages (or Graph partitions) in flight at once.
+PAGE_CONCURRENCY = 4
+JAMF_PAGE_SIZE = 500
+
+_DONE = object()
+
+
+def retry_delay(resp, attempt):
+    """Seconds to wait before retrying a throttled response (at most MAX_RETRY_AFTER)."""
+    try:
+        delay = float(resp.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        delay = BACKOFF_BASE * (2 ** attempt)
+    return min(max(0.0, delay), MAX_RETRY_AFTER)
+
+
+def get_with_backoff(cache, url, deadline=None, **kwargs):
+    """
+    Authorized GET that honours 429/503 Retry-After; raises on other errors,
+    and on throttling that would outlast `deadline` (a time.monotonic() value).
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        resp = authorized_get(cache, url, **kwargs)
+        if resp.status_code not in (429, 503) or attempt == MAX_RETRIES:
+            resp.raise_for_status()
+            return resp
+        delay = retry_delay(resp, attempt)
+        if deadline is not None and time.monotonic() + delay > deadline:
+            resp.raise_for_status()
+            return resp
+        time.sleep(delay)
+
+
+def bounded_map(fn, items, workers=PAGE_CONCURRENCY):
+    """Like map(), in order, with at most `workers` calls in flight."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_graph(cache, url, timeout=10, deadline=None):
+    """Yields every item of a Graph collection, following @odata.nextLink."""
+    while url:
+        body = get_with_backoff(cache, url, deadline, timeout=timeout).json()
+        yield from body.get("value", [])
+        url = body.get("@odata.nextLink")
+
+
+def iter_graph_partitions(cache, urls, timeout=10, workers=PAGE_CONCURRENCY, deadline=None):
+    """
+    Pages several Graph queries (e.g. one per model filter) concurrently and
+    yields their items as they arrive. The hand-off queue is bounded, so slow
+    consumers apply back-pressure instead of buffering whole result sets.
+    A consumer that stops early (error, close()) releases every producer.
+    """
+    if len(urls) == 1:
+        yield from iter_graph(cache, urls[0], timeout, deadline)
+        return
+
+    items = queue.Queue(maxsize=1000)
+    errors = []
+    slots = threading.Semaphore(workers)
+    stop = threading.Event()
+
+    def put(item):
+        # Never blocks for good: gives up once the consumer has gone.
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def drain(url):
+        with slots:
+            try:
+                if stop.is_set(): return
+                for item in iter_graph(cache, url, timeout, deadline):
+                    if not put(item): return
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put(_DONE)
+
+    for url in urls:
+        threading.Thread(target=drain, args=(url,), name="graph-partition", daemon=True).start()
+
+    try:
+        remaining = len(urls)
+        while remaining:
+            item = items.get()
+            if item is _DONE:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        stop.set()
+        while not items.empty():
+            items.get_nowait()
+    if errors:
+        raise errors[0]
+
+
+def iter_jamf_inventory(cache, base_url, params, page_size=JAMF_PAGE_SIZE, timeout=10, deadline=None):
+    """
+    Yields computers from the paginated Jamf Pro /api/v1/computers-inventory
+    endpoint. The first page reports totalCount; the rest are fetched with
+    bounded concurrency.
+    """
+    def page(number):
+        query = urlencode([*params, ("page", number), ("page-size", page_size)])
+        return get_with_backoff(cache, f"{base_url}/api/v1/computers-inventory?{query}", deadline, timeout=timeout).json()
+
+    first = page(0)
+    yield from first.get("results", [])
+    pages = math.ceil(first.get("totalCount", 0) / page_size)
+    for body in bounded_map(page, range(1, pages)):
+        yield from body.get("results", [])
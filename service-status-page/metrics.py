@@ -0,0 +1,171 @@
+"""
+Minimal Prometheus-style metrics (text exposition format 0.0.4).
+
+Only what the dashboard needs: labelled counters, gauges and histograms held
+in process memory and rendered by the /metrics route. Kept dependency-free so
+the hot paths (fetch layer, collectors, index()) can record without any
+optional package installed.
+"""
+import threading
+import time
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {value:g}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [per-bucket counts, sum, count]; buckets are cumulated on render.
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = 'le="%g"' % bound
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        inf = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, inf)} {count}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:g}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render():
+    """Every registered metric in Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==========================================
+# DASHBOARD METRICS
+# ==========================================
+
+UPSTREAM_LATENCY = Histogram("upstream_request_seconds", "Upstream HTTP request latency, body included.", ["host"])
+UPSTREAM_BYTES = Counter("upstream_response_bytes_total", "Upstream response body bytes received.", ["host"])
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Upstream requests that failed, by reason.", ["host", "reason"])
+FETCH_CACHE = Counter("fetch_cache_total", "Shared fetch layer lookups: hit (same cycle), error (same cycle, replayed failure), not_modified (304) or miss.", ["result"])
+FEED_PARSE = Counter("feed_parse_total", "Feeds parsed, by parser (stream or the feedparser fallback).", ["parser"])
+RENDER_CACHE = Counter("render_cache_total", "Rendered HTML cache lookups.", ["cache", "result"])
+COLLECTOR_SECONDS = Histogram("collector_seconds", "Time spent in each collector.", ["collector"])
+COLLECTOR_ERRORS = Counter("collector_errors_total", "Collector calls that raised.", ["collector"])
+SNAPSHOT_AGE = Gauge("snapshot_age_seconds", "Seconds since each snapshot section was refreshed.", ["section"])
+BREAKER_STATE = Gauge("upstream_breaker_open", "1 while an upstream's circuit breaker is open or half-open.", ["upstream"])
+SNAPSHOT_LEADER = Gauge("snapshot_leader", "1 if this process polls upstreams (holds the shared snapshot lease).")
+INDEX_RENDER = Histogram("index_render_seconds", "Time to build the / response (cache hit or render).")
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+SSE_CLIENTS = Gauge("sse_clients", "Open /events streams.")
+
+
+def timed(collector):
+    """Decorator recording a collector's duration and failures."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                COLLECTOR_ERRORS.inc(collector=collector)
+                raise
+            finally:
+                COLLECTOR_SECONDS.observe(time.perf_counter() - started, collector=collector)
+        return wrapper
+    return decorate
@@ -0,0 +1,303 @@
+"""
+Declarative status providers.
+
+Every tile on the services grid comes from one entry in data.STATUS_PROVIDERS:
+
+    {"name": "Atlassian", "adapter": "statuspage", "link": ..., "logo": ...,
+     "sources": [{"name": "Confluence", "url": ".../api/v2/summary.json"}, ...]}
+
+An adapter turns one source URL into a small fragment
+{"class", "status", "tags", "feed"}; the fragments of all of a provider's
+sources are folded into its tile (worst status wins). Every source is its own
+upstream in the app's fan-out, with its own breaker and poll interval, so
+adding a vendor is a config line rather than code. collect_tiles() runs
+that fan-out for both the web app and the terminal dashboard (main.py).
+
+Built-in adapters:
+* statuspage -> Atlassian Statuspage summary.json (GitHub, Atlassian, ...)
+* rss        -> RSS/Atom incident feeds (Microsoft, ...)
+* aws_health -> the aggregated AWS Health current-events document, fetched
+                once per cycle and shared by every AWS service/region tile;
+                per-slug RSS is used when it cannot be read
+* custom     -> any "module:function" taking (provider, source)
+"""
+import importlib
+import json
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import partial
+
+from breaker import run_fanout, upstream
+from feeds import parse_date
+from fetch import begin_cycle, fetch, fetch_feed, fetch_json
+from metrics import timed
+
+SEVERITY = {"good": 0, "warning": 1, "critical": 2}
+
+# Statuspage component states and incident impacts mapped to tile classes.
+STATUSPAGE_COMPONENTS = {
+    "major_outage": ("critical", "Major Outage"),
+    "partial_outage": ("warning", "Partial Outage"),
+    "degraded_performance": ("warning", "Degraded Performance"),
+}
+STATUSPAGE_IMPACT = {"critical": "critical", "major": "critical"}
+
+# RSS/Atom entry titles are classified by keyword.
+RSS_CLEAR = ("resolved", "informational")
+RSS_CRITICAL = ("outage", "interruption", "major", "critical")
+RSS_WARNING = ("degradation", "issue", "investigating", "incident")
+
+# AWS Health event status codes; 1 (informational) and 0 (resolved) only
+# show up in the feed.
+AWS_STATUS = {"3": ("critical", "Service Disruption"), "2": ("warning", "Degraded Performance")}
+AWS_RSS_URL = "https://status.aws.amazon.com/rss/{service}-{region}.rss"
+# Splits an AWS Health slug such as 'ec2-us-east-1' into service and region.
+AWS_REGION_SUFFIX = re.compile(r"-([a-z]{2}(?:-gov)?-[a-z]+-\d)$")
+
+# One URL polled for a provider; 'key' names its breaker / metrics series.
+Source = namedtuple("Source", ["key", "name", "url"])
+
+ADAPTERS = {}
+
+
+def adapter(kind):
+    """Registers collect(provider, source) -> fragment under an adapter name."""
+    def register(fn):
+        ADAPTERS[kind] = fn
+        return fn
+    return register
+
+
+def fragment():
+    return {"class": "good", "status": None, "tags": [], "feed": [], "incident": None}
+
+
+def clock(when):
+    """HH:MM (server local time) for a feed timestamp, or a placeholder."""
+    return when.astimezone().strftime("%H:%M") if when else "--:--"
+
+
+def escalate(result, cls, status, incident=None):
+    """Raises a fragment's class/status (and the incident behind it); never downgrades it."""
+    if SEVERITY[cls] > SEVERITY[result["class"]]:
+        result["class"], result["status"], result["incident"] = cls, status, incident
+
+
+def merge(result, part, label=None):
+    """
+    Folds one fragment into another. With a label (source or region name)
+    the part's feed items are prefixed and a non-good part adds a tag.
+    """
+    escalate(result, part["class"], part["status"], part.get("incident"))
+    result["tags"].extend(part["tags"])
+    if label is None:
+        result["feed"].extend(part["feed"])
+        return
+    if part["class"] != "good": result["tags"].append(label)
+    result["feed"].extend(dict(item, text=f"[{label}] {item['text']}") for item in part["feed"])
+
+
+@adapter("statuspage")
+def collect_statuspage(provider, source):
+    """
+    Statuspage summary.json. Watched components (the provider's
+    "components" list) and unresolved incidents drive the status; with a
+    watchlist, only incidents affecting a watched component count. Every
+    incident is listed in the feed.
+    """
+    data = fetch_json(source.url, timeout=provider.timeout)
+    result = fragment()
+    watched = provider.config.get("components") or ()
+    for comp in data.get("components", []):
+        level = STATUSPAGE_COMPONENTS.get(comp.get("status"))
+        if level and comp["name"] in watched:
+            escalate(result, *level)
+            result["tags"].append(comp["name"])
+    for inc in data.get("incidents", [])[:provider.entries]:
+        if not watched or any(c.get("name") in watched for c in inc.get("components") or []):
+            escalate(result, STATUSPAGE_IMPACT.get(inc.get("impact"), "warning"), "Active Incident", inc.get("id"))
+        result["feed"].append({"time": clock(parse_date(inc.get("created_at"))), "text": inc["name"]})
+    return result
+
+
+@adapter("rss")
+def collect_rss(provider, source):
+    """
+    RSS/Atom incident feed; the newest `entries` items are classified by
+    title keyword. Providers whose feeds only carry incidents (AWS) set
+    "open_status" so any unresolved item counts as a warning.
+    """
+    return classify_feed(provider, fetch_feed(source.url, timeout=provider.timeout))
+
+
+def classify_feed(provider, feed, open_status=None):
+    result = fragment()
+    open_status = provider.config.get("open_status", open_status)
+    for entry in feed.entries[:provider.entries]:
+        title = entry.title.lower()
+        if not any(k in title for k in RSS_CLEAR):
+            if any(k in title for k in RSS_CRITICAL):
+                escalate(result, "critical", "Major Outage", entry.link or entry.title)
+            elif any(k in title for k in RSS_WARNING):
+                escalate(result, "warning", "Service Degradation", entry.link or entry.title)
+            elif open_status:
+                escalate(result, "warning", open_status, entry.link or entry.title)
+        result["feed"].append({"time": clock(entry.published), "text": entry.title})
+    return result
+
+
+def split_slug(slug):
+    """'ec2-us-east-1' -> ('ec2', 'us-east-1'); region-less slugs are 'global'."""
+    match = AWS_REGION_SUFFIX.search(slug)
+    return (slug[:match.start()], match.group(1)) if match else (slug, "global")
+
+
+def parse_aws_events(resp):
+    """
+    Indexes the AWS Health current-events document by (service, region).
+    The document is a JSON list, served UTF-16 encoded at times.
+    """
+    raw = resp.content
+    text = raw.decode("utf-16") if raw[:2] in (b"\xff\xfe", b"\xfe\xff") else raw.decode("utf-8-sig")
+    index = {}
+    for event in json.loads(text) if text.strip() else []:
+        index.setdefault(split_slug(event.get("service") or ""), []).append(event)
+    return index
+
+
+def aws_event_fragment(provider, events):
+    result = fragment()
+    for event in events[:provider.entries]:
+        summary = event.get("summary") or event.get("service_name") or "AWS event"
+        level = AWS_STATUS.get(str(event.get("status")))
+        if level and "[resolved]" not in summary.lower():
+            escalate(result, *level, event.get("arn") or summary)
+        stamp = event.get("date")
+        when = datetime.fromtimestamp(int(stamp), timezone.utc) if str(stamp or "").isdigit() else None
+        result["feed"].append({"time": clock(when), "text": summary})
+    return result
+
+
+@adapter("aws_health")
+def collect_aws_health(provider, source):
+    """
+    Service tile over one or more regions. The events document is one URL
+    for every AWS tile, so the fetch layer downloads it once per cycle; if
+    that download fails, every tile gets the error at once and uses RSS.
+    """
+    service = provider.config["service"]
+    regions = provider.config.get("regions") or ["us-east-1"]
+    try:
+        index = fetch(source.url, parse_aws_events, timeout=provider.timeout)
+        parts = [(region, aws_event_fragment(provider, index.get((service, region), []))) for region in regions]
+    except Exception as e:
+        print(f"AWS Health Error ({provider.name}): {e}; using RSS")
+        parts = [
+            (region, classify_feed(provider, fetch_feed(AWS_RSS_URL.format(service=service, region=region), timeout=provider.timeout), "Service Issue"))
+            for region in regions
+        ]
+    result = fragment()
+    for region, part in parts:
+        merge(result, part, region.upper() if len(regions) > 1 else None)
+    return result
+
+
+@adapter("custom")
+def collect_custom(provider, source):
+    """Delegates to the provider's "collect": "module:function"."""
+    return provider.custom(provider, source)
+
+
+def resolve(path):
+    """Imports a 'module:function' reference."""
+    module, _, name = path.partition(":")
+    if not module or not name:
+        raise ValueError(f"expected 'module:function', got {path!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+class Provider:
+    """One configured tile: its adapter, sources and display settings."""
+
+    def __init__(self, config):
+        self.config = config
+        self.name = config["name"]
+        kind = config.get("adapter", "statuspage")
+        if kind not in ADAPTERS:
+            raise ValueError(f"{self.name}: unknown adapter {kind!r}")
+        self.custom = resolve(config["collect"]) if kind == "custom" else None
+        self.logo = config.get("logo", "")
+        self.link = config.get("link", "")
+        self.tag = config.get("tag", "Global")
+        self.ok_status = config.get("ok_status", "Operational")
+        self.interval = config.get("interval")
+        self.entries = config.get("entries", 3)
+        self.timeout = config.get("timeout", 5)
+
+        sources = config.get("sources") or [{"name": self.name, "url": config.get("url")}]
+        if not all(s.get("url") for s in sources):
+            raise ValueError(f"{self.name}: every source needs a url")
+        single = len(sources) == 1
+        self.sources = [Source(self.name if single else f"{self.name}:{s['name']}", s["name"], s["url"]) for s in sources]
+        # Timed per provider so /metrics shows which vendor is slow.
+        self.collect = timed(self.name)(partial(ADAPTERS[kind], self))
+
+    def unknown(self):
+        """Placeholder for a provider none of whose sources has answered."""
+        return {
+            "name": self.name, "status": "Status Unknown", "class": "unknown",
+            "logo": self.logo, "url": self.link, "feed": [], "tag": self.tag, "stale": True
+        }
+
+    def tile(self, results):
+        """
+        Folds (source, fragment, fresh) triples into the provider's tile.
+        Sources that never answered (fragment None) are left out; the tile
+        is stale if any fragment it uses is.
+        """
+        answered = [(s, f, fresh) for s, f, fresh in results if f is not None]
+        if not answered:
+            return self.unknown()
+        folded = fragment()
+        multi = len(self.sources) > 1
+        for source, frag, _ in answered:
+            merge(folded, frag, source.name.upper() if multi else None)
+        tile = {
+            "name": self.name, "status": folded["status"] or self.ok_status, "class": folded["class"],
+            "logo": self.logo, "url": self.link, "feed": folded["feed"],
+            "tag": folded["tags"] or self.tag, "incident": folded["incident"]
+        }
+        if not all(fresh and not frag.get("stale") for _, frag, fresh in answered):
+            tile["stale"] = True
+        return tile
+
+
+def load_providers(configs):
+    """Builds Providers from data.py config, rejecting duplicate names."""
+    providers, seen = [], set()
+    for config in configs:
+        provider = Provider(config)
+        if provider.name in seen:
+            raise ValueError(f"duplicate provider {provider.name!r}")
+        seen.add(provider.name)
+        providers.append(provider)
+    return providers
+
+
+def collect_tiles(providers, pool, deadline):
+    """
+    Fetches every provider source concurrently on `pool` and returns the
+    tiles in config order. Sources still running at `deadline` (a
+    time.monotonic() value) are served stale; see breaker.run_fanout.
+    """
+    begin_cycle()  # Shared URLs (e.g. the AWS events document) are fetched once per cycle
+
+    jobs = []
+    for provider in providers:
+        for source in provider.sources:
+            upstream(source.key, provider.interval)
+            jobs.append((source.key, provider.collect, (source,), None))
+
+    fanout = iter(run_fanout(jobs, pool, deadline))
+    return [provider.tile([(source, *next(fanout)) for source in provider.sources]) for provider in providers]
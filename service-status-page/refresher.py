@@ -0,0 +1,280 @@
+"""
+Background refresher for dashboard data.
+
+Each dashboard section (services, inventory, tickets, ...) is registered with
+a loader function and a refresh interval. A daemon thread re-runs loaders as
+they fall due and publishes the results into an immutable, versioned Snapshot.
+Routes only ever read the latest Snapshot, so no upstream call happens on the
+request path: a stale value keeps being served until its replacement arrives
+(stale-while-revalidate). Nothing is polled until start() is called; reading
+a snapshot never starts the thread.
+
+With a shared store (see shared.py) only the lease holder runs loaders; the
+other processes import its sections on every tick.
+
+With a state file the snapshot is also saved to disk every SAVE_INTERVAL
+seconds (when it changed), and restore() serves that last-known snapshot
+right after a restart while the first loads are still running.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from shared import decode, encode
+
+# Seconds between saves of a changed snapshot to the state file.
+SAVE_INTERVAL = 30
+
+# One published section: the loader's result, the snapshot version that
+# introduced it and the wall-clock time it was fetched.
+Section = namedtuple("Section", ["data", "version", "updated"])
+
+
+class Snapshot:
+    """Read-only view of every section at a single version."""
+
+    __slots__ = ("version", "sections")
+
+    def __init__(self, version, sections):
+        self.version = version
+        self.sections = MappingProxyType(sections)
+
+    def get(self, name, default=None):
+        """Returns the data for a section, or default if it never loaded."""
+        section = self.sections.get(name)
+        return section.data if section else default
+
+    def age(self, name):
+        """Seconds since a section was last refreshed (None if never)."""
+        section = self.sections.get(name)
+        return time.time() - section.updated if section else None
+
+
+class Refresher:
+    """
+    Runs registered loaders on their own cadence and publishes the results.
+    Loaders must return fresh objects; published data is never mutated.
+    """
+
+    def __init__(self, tick=1.0, shared=None, state_file=None):
+        self.tick = tick
+        self.shared = shared
+        self.state_file = state_file
+        self._saved_version = 0
+        self._saved_at = 0.0
+        # Sections whose first load (or first import from the leader) has finished.
+        self._settled = set()
+        self._shared_seen = 0  # Last shared version imported
+        self._shared_updated = 0.0  # Last shared fetch time imported
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._snapshot = Snapshot(0, {})
+        self._thread = None
+        # Callables notified as listener(name, old_data, new_data) after
+        # each publish (e.g. the SSE event bus).
+        self.listeners = []
+
+    def register(self, name, loader, interval, default=None, prime=False):
+        """
+        Adds a section. `default` is served until the first load completes;
+        `prime=True` loads it synchronously now (only for local, cheap data).
+        """
+        self._sources[name] = {
+            "loader": loader, "interval": interval,
+            "next_run": 0.0, "running": False, "generation": 0,
+        }
+        self._publish(name, default, updated=0.0)
+        if prime:
+            # Primed data is local and cheap, so it is not worth a shared round-trip.
+            self.refresh(name, local=True)
+
+    def snapshot(self):
+        """Latest published Snapshot. O(1) and never blocks on a loader."""
+        return self._snapshot
+
+    def get(self, name, default=None):
+        return self.snapshot().get(name, default)
+
+    @property
+    def leading(self):
+        """True if this process runs the loaders (always, without a shared store)."""
+        return self.shared is None or self.shared.is_leader
+
+    def refresh(self, name, local=False):
+        """
+        Runs one loader synchronously. On failure the old data is kept.
+        With a shared store the result is dropped if the lease was lost,
+        unless `local` publishes it to this process only.
+        """
+        source = self._sources[name]
+        generation = source["generation"]
+        try:
+            data = source["loader"]()
+        except Exception as e:
+            print(f"Refresh Error ({name}): {e}")
+        else:
+            if self.shared is None or local:
+                self._publish(name, data)
+            else:
+                self._share(name, data)
+        finally:
+            with self._lock:
+                self._settled.add(name)
+                source["running"] = False
+                # Invalidated while loading: the result may predate the
+                # change, so run again on the next tick.
+                stale = source["generation"] != generation
+                source["next_run"] = 0.0 if stale else time.monotonic() + source["interval"]
+
+    def invalidate(self, name):
+        """
+        Schedules a section to reload on the next tick (e.g. after a config
+        change). The current data keeps being served until the reload lands.
+        """
+        with self._lock:
+            source = self._sources[name]
+            source["generation"] += 1
+            source["next_run"] = 0.0
+        self._wake.set()
+
+    def pending(self):
+        """Sections still waiting for their first load; empty once warmed up."""
+        with self._lock:
+            return [name for name in self._sources if name not in self._settled]
+
+    @property
+    def alive(self):
+        """False if the background thread was started and has died."""
+        return self._thread is None or self._thread.is_alive()
+
+    def save(self):
+        """Writes every loaded section to the state file (atomically)."""
+        snap = self._snapshot
+        sections = {name: {"updated": s.updated, "data": s.data} for name, s in snap.sections.items() if s.updated}
+        tmp = f"{self.state_file}.tmp"
+        try:
+            if os.path.dirname(self.state_file):
+                os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(tmp, "w") as f:
+                f.write(encode(sections))
+            os.replace(tmp, self.state_file)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Snapshot Save Error ({self.state_file}): {e}")
+            return
+        self._saved_version = snap.version
+
+    def restore(self):
+        """
+        Publishes the sections saved by save() that have not loaded yet, with
+        their original fetch times. Listeners are not notified: restored data
+        is not a transition. Returns the names restored.
+        """
+        try:
+            with open(self.state_file) as f:
+                saved = decode(f.read())
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"Snapshot Restore Error ({self.state_file}): {e}")
+            return []
+        restored = []
+        for name, entry in saved.items():
+            current = self._snapshot.sections.get(name)
+            if name in self._sources and current is not None and not current.updated:
+                self._publish(name, entry["data"], entry["updated"], notify=False)
+                restored.append(name)
+        return restored
+
+    def refresh_all(self):
+        """Synchronously reloads every section (used by bench.py and in tests)."""
+        for name in list(self._sources):
+            self.refresh(name)
+
+    def start(self):
+        """Starts the background thread once; safe to call repeatedly."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="refresher", daemon=True)
+                self._thread.start()
+
+    def _publish(self, name, data, updated=None, version=None, notify=True):
+        # Copy-on-write: readers holding the previous Snapshot are unaffected.
+        with self._lock:
+            previous = self._snapshot.sections.get(name)
+            updated = time.time() if updated is None else updated
+            sections = dict(self._snapshot.sections)
+            if previous is not None and previous.data == data:
+                # Same data, newer fetch time: the section and snapshot keep
+                # their versions, so ETags and cached renders stay valid.
+                sections[name] = previous._replace(updated=updated)
+                self._snapshot = Snapshot(self._snapshot.version, sections)
+                return
+            # Shared versions are adopted as-is so every process agrees on them.
+            version = max(version or 0, self._snapshot.version + 1)
+            sections[name] = Section(data, version, updated)
+            self._snapshot = Snapshot(version, sections)
+
+        if previous is not None and notify:
+            for listener in self.listeners:
+                try:
+                    listener(name, previous.data, data)
+                except Exception as e:
+                    print(f"Listener Error ({name}): {e}")
+
+    def _due(self):
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for name, source in self._sources.items():
+                if not source["running"] and source["next_run"] <= now:
+                    source["running"] = True
+                    due.append(name)
+        return due
+
+    def _share(self, name, data):
+        updated = time.time()
+        try:
+            version = self.shared.put(name, data, updated)
+        except Exception as e:
+            # Shared store unusable: keep serving this process's own result.
+            print(f"Shared Snapshot Error ({name}): {e}")
+            self._publish(name, data, updated)
+            return
+        if version is not None:
+            self._publish(name, data, updated, version)
+
+    def _follow(self):
+        """Imports sections the leader published since the last tick."""
+        for name, version, updated, data in self.shared.changes(self._shared_seen, self._shared_updated):
+            self._shared_seen = max(self._shared_seen, version)
+            self._shared_updated = max(self._shared_updated, updated)
+            if name in self._sources:
+                self._publish(name, data, updated, version)
+                with self._lock:
+                    self._settled.add(name)
+
+    def _run(self):
+        while True:
+            try:
+                leading = self.shared is None or self.shared.acquire()
+                if not leading:
+                    self._follow()
+            except Exception as e:
+                # Fall back to polling locally until the store is usable again.
+                print(f"Shared Snapshot Error: {e}")
+                leading = True
+            if leading:
+                # Each loader gets its own worker so one slow upstream
+                # never delays the other sections.
+                for name in self._due():
+                    threading.Thread(target=self.refresh, args=(name,), name=f"refresh-{name}", daemon=True).start()
+            if self.state_file and self._snapshot.version != self._saved_version and time.monotonic() - self._saved_at >= SAVE_INTERVAL:
+                self._saved_at = time.monotonic()
+                self.save()
+            self._wake.wait(self.tick)
+            self._wake.clear()
@@ -0,0 +1,60 @@
+"""
+Cache for rendered HTML.
+
+Fragments and whole pages are keyed by the snapshot version (plus any other
+input) that produced them, so a repeat view with unchanged data skips Jinja
+entirely and is served from pre-encoded, pre-compressed bytes (gzip, and
+brotli when the optional 'brotli' package is installed).
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from metrics import RENDER_CACHE
+
+try:
+    import brotli
+except ImportError:  # Optional: pages are then served gzip-only
+    brotli = None
+
+# A fully rendered page: UTF-8 body, its gzip and brotli (None without the
+# package) variants and a strong ETag.
+Page = namedtuple("Page", ["body", "gzipped", "etag", "brotli"])
+
+
+class RenderCache:
+    """Small thread-safe LRU of rendered output. `name` labels its metrics."""
+
+    def __init__(self, size=32, name="default"):
+        self.size = size
+        self.name = name
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        """Returns the cached value for key, calling render() on a miss."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                RENDER_CACHE.inc(cache=self.name, result="hit")
+                return self._items[key]
+        RENDER_CACHE.inc(cache=self.name, result="miss")
+        # Rendering happens outside the lock; two concurrent misses for the
+        # same key just render twice and store identical output.
+        value = render()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return value
+
+
+def encode_page(html):
+    """Pre-encodes rendered HTML once: raw bytes, gzip/brotli bytes and an ETag."""
+    body = html.encode("utf-8")
+    return Page(
+        body, gzip.compress(body, compresslevel=6), hashlib.sha1(body).hexdigest(),
+        brotli.compress(body, quality=5) if brotli else None
+    )
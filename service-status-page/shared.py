@@ -0,0 +1,156 @@
+"""
+Cross-process snapshot sharing (SQLite in WAL mode).
+
+With several Waitress processes or replicas pointed at the same database
+file, only the holder of the lease runs the refresher's loaders (and so
+talks to the upstreams and identity providers). It writes every section it
+publishes to the `sections` table; the other processes import whatever
+changed since their last read on each tick and serve it as their own
+snapshot.
+
+The lease is a single row (owner, expires). The leader renews it while
+alive; once it lapses any follower takes it over and starts polling, so a
+dead leader costs at most LEASE_TTL seconds of staleness.
+
+Section versions are a shared sequence (milliseconds since the epoch, kept
+strictly increasing), so every process reports the same version, and
+therefore the same ETags, for the same data. Writing unchanged data only
+moves a section's fetch time; its version stays.
+
+SQLite WAL needs the processes to share one host (or one volume on it);
+it is not safe on network filesystems.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+LEASE_TTL = 15.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lease (id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT, expires REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS sections (
+    name TEXT PRIMARY KEY, version INTEGER NOT NULL, updated REAL NOT NULL, data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_by_version ON sections (version);
+INSERT OR IGNORE INTO lease (id, owner, expires) VALUES (1, NULL, 0);
+"""
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _hook(obj):
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def encode(data):
+    return json.dumps(data, default=_default, separators=(",", ":"))
+
+
+def decode(text):
+    return json.loads(text, object_hook=_hook)
+
+
+class SharedSnapshot:
+    """Lease plus section store in one SQLite file."""
+
+    def __init__(self, path, ttl=LEASE_TTL, owner=None):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._lock = threading.Lock()
+        self._expires = 0.0  # our own lease expiry (0 while following)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    @property
+    def is_leader(self):
+        return time.time() < self._expires
+
+    def acquire(self):
+        """
+        Takes or renews the lease if it is free, expired or already ours.
+        Renewal only writes once half the TTL has passed. Returns True while leading.
+        """
+        now = time.time()
+        if self._expires - now > self.ttl / 2:
+            return True
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                owner, expires = self._conn.execute("SELECT owner, expires FROM lease WHERE id = 1").fetchone()
+                if owner == self.owner or expires < now:
+                    self._conn.execute("UPDATE lease SET owner = ?, expires = ? WHERE id = 1", (self.owner, now + self.ttl))
+                    self._expires = now + self.ttl
+                else:
+                    self._expires = 0.0
+                self._conn.execute("COMMIT")
+            except sqlite3.OperationalError as e:
+                # Busy database: keep the current role until the next tick.
+                if self._conn.in_transaction: self._conn.execute("ROLLBACK")
+                print(f"Lease Error ({self.owner}): {e}")
+        return self.is_leader
+
+    def release(self):
+        """Gives the lease up (e.g. on shutdown) so a follower can take over at once."""
+        with self._lock:
+            self._conn.execute("UPDATE lease SET expires = 0 WHERE id = 1 AND owner = ?", (self.owner,))
+            self._expires = 0.0
+
+    def put(self, name, data, updated):
+        """
+        Stores a section if we still hold the lease. Returns its shared
+        version, or None if the lease was lost (the write is dropped).
+        """
+        body = encode(data)
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                owner, expires = self._conn.execute("SELECT owner, expires FROM lease WHERE id = 1").fetchone()
+                row = self._conn.execute("SELECT version, data FROM sections WHERE name = ?", (name,)).fetchone()
+                if owner != self.owner or expires < time.time():
+                    self._expires = 0.0
+                    version = None
+                elif row and row[1] == body:
+                    # Unchanged: only the fetch time moves and the version (so
+                    # every process's ETag) stays the same.
+                    self._conn.execute("UPDATE sections SET updated = ? WHERE name = ?", (updated, name))
+                    version = row[0]
+                else:
+                    last = self._conn.execute("SELECT max(version) FROM sections").fetchone()[0] or 0
+                    version = max(last + 1, int(time.time() * 1000))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sections (name, version, updated, data) VALUES (?, ?, ?, ?)",
+                        (name, version, updated, body)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                # A transaction left open would fail every later put/acquire.
+                if self._conn.in_transaction: self._conn.execute("ROLLBACK")
+                raise
+        return version
+
+    def changes(self, since=0, updated_since=None):
+        """
+        (name, version, updated, data) for every section written after version
+        `since`, plus those only re-fetched (same data) after `updated_since`.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, version, updated, data FROM sections WHERE version > ? OR updated > ? ORDER BY version",
+                (since, float("inf") if updated_since is None else updated_since)
+            ).fetchall()
+        return [(name, version, updated, decode(data)) for name, version, updated, data in rows]
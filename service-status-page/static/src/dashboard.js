@@ -0,0 +1,103 @@
+// Partial refresh: poll /api/status (a 304 when nothing changed) and, for
+// each section whose version moved, swap in its server-rendered partial from
+// /fragments/<section>. Tile markup only lives in templates/partials/.
+(function () {
+    const POLL_MS = 30000;
+    // Seeded with the version this page was rendered from, so the first poll is a 304.
+    let etag = `"${document.querySelector('meta[name="status-etag"]').content}"`, versions = null, maintenance = null;
+    // Section -> element holding its partial.
+    const TARGETS = {services: 'services-grid', inventory: 'inventory-grid', tickets: 'ticket-list', admin_links: 'admin-links'};
+    // Markup each keyed tile was last rendered from (the DOM drifts: feeds get expanded).
+    const seen = {};
+    const loading = {};
+
+    const stamp = () => { document.getElementById('last-updated').textContent = new Date().toLocaleTimeString([], {hour12: false}); };
+    const keyed = (el) => `:scope > [data-key="${CSS.escape(el.dataset.key)}"]`;
+
+    Object.values(TARGETS).forEach((id) => {
+        for (const el of document.getElementById(id).children) if (el.dataset.key) seen[id + el.dataset.key] = el.outerHTML;
+    });
+
+    // Replaces changed tiles in place, keeping server order; untouched tiles are left alone.
+    function patch(container, fresh) {
+        const items = [...fresh.children];
+        if (!items.every((el) => el.dataset.key)) return container.replaceChildren(...items);
+        const keep = new Set();
+        let prev = null;
+        for (const item of items) {
+            const id = container.id + item.dataset.key, markup = item.outerHTML;
+            keep.add(item.dataset.key);
+            let el = container.querySelector(keyed(item));
+            if (!el || seen[id] !== markup) {
+                el ? el.replaceWith(item) : container.appendChild(item);
+                el = item;
+            }
+            seen[id] = markup;
+            if (prev ? prev.nextElementSibling !== el : container.firstElementChild !== el) {
+                prev ? prev.after(el) : container.prepend(el);
+            }
+            prev = el;
+        }
+        [...container.children].forEach((el) => keep.has(el.dataset.key) || el.remove());
+    }
+
+    // One request per section at a time; a change arriving meanwhile loads it once more.
+    async function load(section) {
+        if (loading[section]) { loading[section] = 'again'; return; }
+        loading[section] = true;
+        try {
+            const resp = await fetch(`/fragments/${section}`);
+            if (resp.ok) {
+                const t = document.createElement('template');
+                t.innerHTML = await resp.text();
+                const container = document.getElementById(TARGETS[section]);
+                patch(container, t.content);
+                if (section === 'tickets') document.getElementById('ticket-count').textContent = `${container.children.length} ACTIVE`;
+                stamp();
+            }
+        } catch (e) { /* Keep showing the last data; the next change retries. */ }
+        const again = loading[section] === 'again';
+        loading[section] = false;
+        if (again) load(section);
+    }
+
+    function apply(snap) {
+        const s = snap.sections;
+        const changed = (name) => !versions || versions[name] !== s[name].version;
+        if (versions && (changed('on_call') || JSON.stringify(s.maintenance.data) !== maintenance)) {
+            return location.reload();  // Header blocks change rarely; a full render is simplest.
+        }
+        maintenance = JSON.stringify(s.maintenance.data);
+        Object.keys(TARGETS).forEach((name) => changed(name) && load(name));
+        versions = Object.fromEntries(Object.entries(s).map(([k, v]) => [k, v.version]));
+        stamp();
+    }
+
+    // Push channel: /events sends only transitions. While it is connected
+    // polling drops to a slow safety net; the browser resumes with Last-Event-ID.
+    const events = window.EventSource ? new EventSource('/events') : null;
+    let timer = null;
+
+    async function poll() {
+        clearTimeout(timer);
+        try {
+            const resp = await fetch('/api/status', {headers: etag ? {'If-None-Match': etag} : {}});
+            if (resp.status === 200) {
+                etag = resp.headers.get('ETag');
+                apply(await resp.json());
+            } else if (resp.status === 304) {
+                stamp();  // Nothing changed since the last poll, which still counts as a sync.
+            }
+        } catch (e) { /* Keep showing the last data; retry on the next tick. */ }
+        timer = setTimeout(poll, events && events.readyState === EventSource.OPEN ? POLL_MS * 10 : POLL_MS);
+    }
+
+    if (events) {
+        events.addEventListener('tile', () => load('services'));
+        events.addEventListener('feed', () => load('services'));
+        events.addEventListener('inventory', () => load('inventory'));
+        events.addEventListener('section', poll);
+        events.addEventListener('resync', poll);
+    }
+    poll();
+})();
@@ -0,0 +1,7 @@
+// Read by build_assets.py (Tailwind standalone CLI). Only classes found in
+// these files end up in static/dist/app.<hash>.css.
+module.exports = {
+  content: ["./templates/**/*.html", "./static/src/**/*.js"],
+  theme: { extend: {} },
+  plugins: [],
+};
@@ -1,32 +1,77 @@
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
 import unittest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
-from app import app, get_health_data, get_on_call, get_maintenance
+os.environ.setdefault("HISTORY_DB", ":memory:")
+os.environ.setdefault("SNAPSHOT_FILE", "")
+from app import app, status, get_health_data, get_on_call, get_maintenance, SERVICE_ORDER
+import app as app_module
+import assets
+import breaker
+import build_assets
+import config
+import feeds
+import fetch
+import history
+import jira
+import main
+from events import EventBus, diff_section, stream
+from inventory import Classifier, Device
+import mdm
+import metrics
+import providers
+from refresher import Refresher
+from shared import SharedSnapshot
+from tokens import TokenCache, authorized_get
 
 class TestDashboard(unittest.TestCase):
 
     def setUp(self):
         self.app = app.test_client()
         self.app.testing = True
+        breaker._upstreams.clear()
 
     # --- 1. EXISTING TESTS (Keep these) ---
-    @patch('app.feedparser.parse')
-    @patch('app.requests.get')
-    def test_get_health_data_success(self, mock_get, mock_feed):
+    @patch('providers.fetch', return_value={})
+    @patch('providers.fetch_feed')
+    @patch('providers.fetch_json')
+    def test_get_health_data_success(self, mock_get, mock_feed, mock_aws):
         # Mock JSON API (GitHub)
-        mock_json = MagicMock()
-        mock_json.json.return_value = {"status": {"indicator": "none", "description": "Good"}, "incidents": []}
-        mock_get.return_value = mock_json
+        mock_get.return_value = {"status": {"indicator": "none", "description": "Good"}, "incidents": []}
 
         # Mock RSS Feed (AWS)
         mock_feed_resp = MagicMock()
-        mock_feed_resp.entries = [MagicMock(title="Service operating normally", published_parsed=(2023,1,1,10,0,0,0,0,0))]
+        mock_feed_resp.entries = [feeds.FeedEntry("Service operating normally", None, datetime(2023, 1, 1, 10, 0), None)]
         mock_feed.return_value = mock_feed_resp
 
         results = get_health_data()
         self.assertTrue(len(results) > 0)
         self.assertEqual(results[0]['status'], "All Services Currently Operational")
 
+    @patch('app.HEALTH_DEADLINE', 0.2)
+    @patch('providers.fetch', side_effect=lambda *a, **kw: time.sleep(1) or {})
+    @patch('providers.fetch_feed', return_value=MagicMock(entries=[]))
+    @patch('providers.fetch_json', return_value={"components": [], "incidents": []})
+    def test_get_health_data_deadline(self, mock_json, mock_feed, mock_aws):
+        """A hung upstream becomes an 'unknown' tile instead of stalling the page."""
+
+        started = time.monotonic()
+        results = get_health_data()
+        self.assertLess(time.monotonic() - started, 0.9)
+
+        names = [r['name'] for r in results]
+        self.assertEqual(names, [n for n in SERVICE_ORDER if n in names])
+        aws = [r for r in results if r['name'].startswith("AWS")]
+        self.assertEqual(len(aws), 3)
+        self.assertTrue(all(r['class'] == "unknown" for r in aws))
+
     # --- 2. NEW: On-Call Widget Tests ---
     def test_on_call_structure(self):
         """
@@ -121,5 +166,936 @@ class TestDashboard(unittest.TestCase):
         self.assertIn("Critical Update", html)
         self.assertIn("tab-maint active", html) # Check if the CSS class was applied
 
+
+class TestFetchLayer(unittest.TestCase):
+
+    def setUp(self):
+        fetch._entries.clear()
+        self.session = MagicMock()
+        patcher = patch('fetch.session_for', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _resp(self, status, body=None, headers=None):
+        resp = MagicMock(status_code=status, headers=headers or {})
+        resp.json.return_value = body
+        return resp
+
+    def test_conditional_get_reuses_parse_on_304(self):
+        self.session.get.side_effect = [
+            self._resp(200, {"incidents": []}, {"ETag": '"v1"'}),
+            self._resp(304),
+        ]
+        first = fetch.fetch_json("https://example.test/summary.json")
+        fetch.begin_cycle()
+        second = fetch.fetch_json("https://example.test/summary.json")
+
+        self.assertIs(first, second)
+        sent = self.session.get.call_args_list[1].kwargs['headers']
+        self.assertEqual(sent['If-None-Match'], '"v1"')
+
+    def test_identical_urls_fetched_once_per_cycle(self):
+        self.session.get.return_value = self._resp(200, {"ok": True})
+        fetch.begin_cycle()
+        fetch.fetch_json("https://example.test/rss")
+        fetch.fetch_json("https://example.test/rss")
+        self.assertEqual(self.session.get.call_count, 1)
+
+        fetch.begin_cycle()
+        fetch.fetch_json("https://example.test/rss")
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_failure_is_shared_for_the_cycle(self):
+        def hang(url, **kwargs):
+            time.sleep(0.2)
+            raise TimeoutError("read timed out")
+        self.session.get.side_effect = hang
+        metrics.FETCH_CACHE.clear()
+        fetch.begin_cycle()
+        errors = []
+        def tile():
+            try:
+                fetch.fetch_json("https://example.test/currentevents")
+            except TimeoutError as e:
+                errors.append(e)
+        threads = [threading.Thread(target=tile) for _ in range(3)]
+        started = time.monotonic()
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.session.get.call_count, 1)  # the queued callers did not retry it
+        self.assertEqual(len({id(e) for e in errors}), 3)  # each caller raised its own copy
+        self.assertEqual(metrics.FETCH_CACHE._values.get(("error",)), 2)
+        self.assertLess(time.monotonic() - started, 0.4)
+
+        fetch.begin_cycle()
+        self.session.get.side_effect = None
+        self.session.get.return_value = self._resp(200, [])
+        self.assertEqual(fetch.fetch_json("https://example.test/currentevents"), [])
+
+class TestFeeds(unittest.TestCase):
+
+    def test_rss_stops_after_limit(self):
+        items = "".join(f"<item><title>Item {i}</title><pubDate>Mon, 01 Jan 2024 1{i}:30:00 GMT</pubDate></item>" for i in range(3))
+        # Anything after the requested entries is never parsed, broken or not.
+        body = f"<rss><channel>{items}<item><title>broken</item>".encode()
+        feed = feeds.parse_feed(body, limit=3)
+        self.assertEqual([e.title for e in feed.entries], ["Item 0", "Item 1", "Item 2"])
+        self.assertEqual(feed.entries[1].published, datetime(2024, 1, 1, 11, 30, tzinfo=timezone.utc))
+
+    def test_atom_dates_and_links(self):
+        body = b"""<feed xmlns="http://www.w3.org/2005/Atom"><title>x</title>
+            <entry><title>Degraded API</title><link href="https://s.test/1"/><updated>2024-03-02T08:15:00+01:00</updated></entry>
+        </feed>"""
+        entry = feeds.parse_feed(body).entries[0]
+        self.assertEqual(entry.link, "https://s.test/1")
+        self.assertEqual(entry.published, datetime(2024, 3, 2, 7, 15, tzinfo=timezone.utc))
+
+    def test_malformed_feed_falls_back_to_feedparser(self):
+        body = b"<rss><channel><item><title>Outage & recovery</title><pubDate>Tue, 02 Jan 2024 09:00:00 GMT</pubDate></item></channel></rss>"
+        entry = feeds.parse_feed(body).entries[0]
+        self.assertEqual(entry.title, "Outage & recovery")
+        self.assertEqual(entry.published, datetime(2024, 1, 2, 9, 0, tzinfo=timezone.utc))
+
+class TestTokenCache(unittest.TestCase):
+
+    def test_token_reused_until_expiry(self):
+        fetcher = MagicMock(side_effect=[("t1", time.time() + 3600), ("t2", time.time() + 3600)])
+        cache = TokenCache("test", fetcher)
+        self.assertEqual(cache.get(), "t1")
+        self.assertEqual(cache.get(), "t1")
+        self.assertEqual(fetcher.call_count, 1)
+
+    def test_concurrent_callers_share_one_refresh(self):
+        def slow_fetch():
+            time.sleep(0.1)
+            return "shared", time.time() + 3600
+        fetcher = MagicMock(side_effect=slow_fetch)
+        cache = TokenCache("test", fetcher)
+        threads = [threading.Thread(target=cache.get) for _ in range(5)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(fetcher.call_count, 1)
+
+    @patch('tokens.session_for')
+    def test_401_invalidates_and_retries_once(self, mock_session_for):
+        fetcher = MagicMock(side_effect=[("old", time.time() + 3600), ("new", time.time() + 3600)])
+        cache = TokenCache("test", fetcher)
+        session = mock_session_for.return_value
+        session.get.side_effect = [MagicMock(status_code=401), MagicMock(status_code=200)]
+
+        resp = authorized_get(cache, "https://example.test/api", timeout=5)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(session.get.call_args.kwargs['headers']['Authorization'], "Bearer new")
+
+class TestMdmPagers(unittest.TestCase):
+
+    def _resp(self, body, status=200, headers=None):
+        resp = MagicMock(status_code=status, headers=headers or {})
+        resp.json.return_value = body
+        return resp
+
+    @patch('mdm.time.sleep')
+    @patch('mdm.authorized_get')
+    def test_graph_follows_next_link_and_honours_retry_after(self, mock_get, mock_sleep):
+        mock_get.side_effect = [
+            self._resp({"value": [{"model": "a"}], "@odata.nextLink": "https://graph.test/page2"}),
+            self._resp({}, status=429, headers={"Retry-After": "2"}),
+            self._resp({"value": [{"model": "b"}, {"model": "c"}]}),
+        ]
+        devices = list(mdm.iter_graph(MagicMock(), "https://graph.test/page1"))
+        self.assertEqual([d['model'] for d in devices], ["a", "b", "c"])
+        mock_sleep.assert_called_once_with(2.0)
+        self.assertEqual(mock_get.call_args.args[1], "https://graph.test/page2")
+
+    def test_retry_after_is_capped_and_kept_within_deadline(self):
+        throttled = self._resp({}, status=429, headers={"Retry-After": "86400"})
+        self.assertEqual(mdm.retry_delay(throttled, 0), mdm.MAX_RETRY_AFTER)
+        throttled.raise_for_status.side_effect = RuntimeError("429")
+        with patch('mdm.authorized_get', return_value=throttled), patch('mdm.time.sleep') as mock_sleep:
+            with self.assertRaises(RuntimeError):
+                mdm.get_with_backoff(MagicMock(), "https://graph.test", deadline=time.monotonic() + 5)
+        mock_sleep.assert_not_called()
+
+    def test_partition_producers_stop_with_the_consumer(self):
+        def endless(cache, url, timeout=10, deadline=None):
+            while True:
+                yield {"model": url}
+        with patch('mdm.iter_graph', side_effect=endless):
+            devices = mdm.iter_graph_partitions(MagicMock(), ["a", "b", "c"])
+            self.assertEqual(len([next(devices) for _ in range(5)]), 5)
+            devices.close()
+        started = time.monotonic()
+        while any(t.name == "graph-partition" for t in threading.enumerate()) and time.monotonic() - started < 3:
+            time.sleep(0.05)
+        self.assertFalse(any(t.name == "graph-partition" for t in threading.enumerate()))
+
+    @patch('app.iter_graph', return_value=iter([{"model": "HP EliteBook 840 G11", "totalPhysicalMemoryInBytes": 16 * 1024 ** 3}]))
+    @patch('app.iter_graph_partitions')
+    def test_rejected_model_filter_falls_back_to_unfiltered(self, mock_partitions, mock_graph):
+        mock_partitions.side_effect = RuntimeError("Bad Request")
+        mock_partitions.side_effect.response = MagicMock(status_code=400)
+        counts = app_module.count_intune()
+        self.assertEqual(counts["HP G11 (16GB RAM)"], 1)
+        self.assertNotIn("$filter=userId eq null and", mock_graph.call_args.args[1])
+
+    @patch('mdm.authorized_get')
+    def test_jamf_fetches_every_page(self, mock_get):
+        def page(cache, url, **kwargs):
+            number = int(url.split("page=")[1].split("&")[0])
+            return self._resp({"totalCount": 5, "results": [{"id": number * 2 + i} for i in range(2) if number * 2 + i < 5]})
+        mock_get.side_effect = page
+
+        computers = list(mdm.iter_jamf_inventory(MagicMock(), "https://jamf.test", [], page_size=2))
+        self.assertEqual(sorted(c['id'] for c in computers), [0, 1, 2, 3, 4])
+        self.assertEqual(mock_get.call_count, 3)
+
+class TestJiraIndex(unittest.TestCase):
+
+    def _issue(self, id, key, summary, updated, status="In Progress"):
+        category = "done" if status == "Done" else "indeterminate"
+        return {"id": id, "key": key, "fields": {
+            "summary": summary, "status": {"name": status, "statusCategory": {"key": category}},
+            "assignee": None, "updated": updated,
+        }}
+
+    def _resp(self, body):
+        return MagicMock(status_code=200, json=MagicMock(return_value=body))
+
+    @patch('jira.session_for')
+    def test_initial_load_then_delta_merge(self, mock_session_for):
+        get = mock_session_for.return_value.get
+        get.side_effect = [
+            self._resp({"issues": [self._issue("1", "INC-1", "VPN down", "2024-01-01T10:00:00.000+0000")], "nextPageToken": "p2"}),
+            self._resp({"issues": [self._issue("2", "INC-2", "Printer", "2024-01-01T09:00:00.000+0000")], "isLast": True}),
+            self._resp({"issues": [self._issue("2", "INC-2", "Printer", "2024-01-01T11:00:00.000+0000", "Blocked")], "isLast": True}),
+            self._resp({"issues": [
+                self._issue("1", "INC-1", "VPN down", "2024-01-01T12:00:00.000+0000", "Done"),
+                self._issue("9", "OPS-9", "Elsewhere", "2024-01-01T12:00:00.000+0000", "Done"),
+            ], "isLast": True}),
+        ]
+        index = jira.JiraIndex("example.atlassian.net", "me@example.com", "token", "project = IT")
+        self.assertEqual(index.sync(), 2)
+        self.assertEqual(get.call_args_list[1].kwargs['params']['nextPageToken'], "p2")
+        self.assertEqual([t['id'] for t in index.tickets()], ["INC-1", "INC-2"])
+
+        index.cursor -= 300
+        self.assertEqual(index.sync(), 1)
+        params = get.call_args.kwargs['params']
+        self.assertRegex(params['jql'], r"^\(\(project = IT\) OR \(id in \(1, 2\) AND statusCategory = Done\)\) AND updated >= -[78]m ORDER BY updated DESC$")
+        self.assertEqual(params['fields'], jira.FIELDS)
+        tickets = index.tickets()
+        self.assertEqual([(t['id'], t['status']) for t in tickets], [("INC-2", "Blocked"), ("INC-1", "In Progress")])
+        self.assertEqual(tickets[0]['assigned_to'], "Unassigned")
+
+        # Resolved issues leave the index; any Done issue it never held is ignored.
+        self.assertEqual(index.sync(), 2)
+        self.assertEqual([t['id'] for t in index.tickets()], ["INC-2"])
+
+class TestInventoryClassifier(unittest.TestCase):
+
+    def setUp(self):
+        from data import INVENTORY_WATCHLIST
+        self.intune = Classifier(INVENTORY_WATCHLIST, "intune")
+        self.jamf = Classifier(INVENTORY_WATCHLIST, "jamf")
+
+    def test_ram_bins_split_same_model(self):
+        devices = [
+            Device("HP EliteBook 840 G11", 15.6, None),
+            Device("HP EliteBook 840 G11", 47.8, None),
+            Device("HP EliteBook 840 G11", 32.0, None),
+            Device("HP EliteBook 840 G10", 15.6, None),
+        ]
+        counts = self.intune.count(devices)
+        self.assertEqual(counts, {"HP G11 (16GB RAM)": 1, "HP G11 (48GB RAM)": 1})
+
+    def test_model_patterns_and_sources(self):
+        self.assertEqual(self.jamf.classify(Device("MacBook Air (15-inch, M3, 2024)", 16, None)), "MacBook Air 15\"")
+        self.assertEqual(self.jamf.classify(Device("MacBook Pro (16-inch, 2024)", 48, None)), "MacBook M4 Pro 16\"")
+        self.assertIsNone(self.jamf.classify(Device("HP EliteBook 840 G11", 16, None)))
+        self.assertEqual(self.jamf.server_prefixes(), ["MacBook"])
+
+class TestRefresher(unittest.TestCase):
+
+    def test_default_served_until_first_load(self):
+        r = Refresher()
+        r.register("services", lambda: ["fresh"], 60, default=[])
+        self.assertEqual(r._snapshot.get("services"), [])
+        r.refresh("services")
+        self.assertEqual(r._snapshot.get("services"), ["fresh"])
+
+    def test_failed_refresh_keeps_stale_data(self):
+        """Stale-while-revalidate: an upstream error must not blank the section."""
+        calls = []
+        def loader():
+            calls.append(1)
+            if len(calls) > 1:
+                raise RuntimeError("upstream down")
+            return {"count": 3}
+
+        r = Refresher()
+        r.register("inventory", loader, 60, prime=True)
+        version = r._snapshot.version
+        r.refresh("inventory")
+        self.assertEqual(r._snapshot.get("inventory"), {"count": 3})
+        self.assertEqual(r._snapshot.version, version)
+
+    def test_snapshots_are_immutable(self):
+        r = Refresher()
+        r.register("tickets", lambda: ["a"], 60, prime=True)
+        old = r._snapshot
+        r.register("on_call", lambda: {"name": "x"}, 60, prime=True)
+        self.assertIsNone(old.get("on_call"))
+        self.assertGreater(r._snapshot.version, old.version)
+        with self.assertRaises(TypeError):
+            old.sections["tickets"] = None
+
+    def test_saved_snapshot_is_restored_until_first_load(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "snapshot.json")
+        window = {"title": "Firewall", "start": datetime(2024, 1, 6, 22, 0), "end": None}
+
+        old = Refresher(state_file=path)
+        old.register("services", lambda: [{"name": "GitHub", "class": "good"}], 60, default=[])
+        old.register("maintenance", lambda: window, 60, default={})
+        old.refresh_all()
+        old.save()
+
+        new = Refresher(state_file=path)
+        new.register("services", MagicMock(), 60, default=[])
+        new.register("maintenance", lambda: {"title": "Primed"}, 60, prime=True)
+        listener = MagicMock()
+        new.listeners.append(listener)
+        self.assertEqual(new.restore(), ["services"])
+
+        self.assertEqual(new._snapshot.get("services"), [{"name": "GitHub", "class": "good"}])
+        self.assertEqual(new._snapshot.sections["services"].updated, old._snapshot.sections["services"].updated)
+        self.assertEqual(new._snapshot.get("maintenance"), {"title": "Primed"})  # loaded data wins
+        self.assertEqual(new.pending(), ["services"])  # restored is not warmed up
+        listener.assert_not_called()
+
+    def test_reads_do_not_start_polling(self):
+        r = Refresher()
+        r.register("services", MagicMock(), 60, default=[])
+        r.snapshot(); r.get("services")
+        self.assertIsNone(r._thread)
+        app.test_client().get('/')
+        self.assertIsNone(status._thread)
+
+    def test_invalidate_during_load_reruns(self):
+        r = Refresher()
+        r.register("inventory", lambda: r.invalidate("inventory") or [], 300)
+        r.refresh("inventory")
+        self.assertEqual(r._due(), ["inventory"])
+
+class TestSharedSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "snapshot.db")
+
+    def test_single_leader_and_takeover(self):
+        a, b = SharedSnapshot(self.path, owner="a"), SharedSnapshot(self.path, owner="b")
+        self.assertTrue(a.acquire())
+        self.assertFalse(b.acquire())
+
+        window = {"start": datetime(2024, 1, 6, 22, 0), "end": None}
+        version = a.put("maintenance", window, 1.0)
+        self.assertEqual(b.changes(), [("maintenance", version, 1.0, window)])
+
+        a.release()
+        self.assertTrue(b.acquire())
+        self.assertIsNone(a.put("maintenance", {}, 2.0))
+        self.assertFalse(a.is_leader)
+
+    def test_failed_put_rolls_back(self):
+        a = SharedSnapshot(self.path, owner="a")
+        self.assertTrue(a.acquire())
+        # A deferred foreign key makes the COMMIT itself fail.
+        a._conn.executescript("""
+            PRAGMA foreign_keys = ON;
+            CREATE TABLE orphans (ref INTEGER REFERENCES lease (id) DEFERRABLE INITIALLY DEFERRED);
+            CREATE TRIGGER orphan AFTER INSERT ON sections BEGIN INSERT INTO orphans VALUES (2); END;
+        """)
+        with self.assertRaises(sqlite3.IntegrityError):
+            a.put("maintenance", {}, 1.0)
+        self.assertFalse(a._conn.in_transaction)
+        a._conn.execute("DROP TRIGGER orphan")
+        self.assertTrue(a.acquire())
+        self.assertIsNotNone(a.put("maintenance", {}, 2.0))
+
+    def test_followers_serve_the_leaders_snapshot(self):
+        loader, follower_loader = MagicMock(return_value=[{"name": "GitHub"}]), MagicMock()
+        leader = Refresher(shared=SharedSnapshot(self.path, owner="leader"))
+        follower = Refresher(shared=SharedSnapshot(self.path, owner="follower"))
+        leader.register("services", loader, 60, default=[])
+        follower.register("services", follower_loader, 60, default=[])
+
+        self.assertTrue(leader.shared.acquire())
+        self.assertFalse(follower.shared.acquire())
+        leader.refresh("services")
+        follower._follow()
+
+        self.assertEqual(follower._snapshot.get("services"), [{"name": "GitHub"}])
+        self.assertEqual(follower._snapshot.sections["services"].version, leader._snapshot.sections["services"].version)
+        follower_loader.assert_not_called()
+
+        # A re-fetch with the same data keeps the shared version.
+        version = follower._snapshot.sections["services"].version
+        leader.refresh("services")
+        follower._follow()
+        self.assertEqual(follower._snapshot.sections["services"].version, version)
+        self.assertEqual(follower._snapshot.sections["services"].updated, leader._snapshot.sections["services"].updated)
+
+class TestConfigReload(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "data.py")
+        with open(app_module.data.__file__) as f:
+            self.source = f.read()
+        self.write(self.source)
+        self.apply = MagicMock()
+        self.watcher = config.ConfigWatcher(self.path, self.apply)
+
+    def write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text)
+        # Make sure the change is visible even on coarse mtime filesystems.
+        stamp = time.time() + len(text) % 7 + 1
+        os.utime(self.path, (stamp, stamp))
+
+    def test_only_changed_settings_are_reported(self):
+        self.write(self.source.replace('"name": "CDW"', '"name": "CDW Direct"'))
+        self.assertEqual(self.watcher.check(), {"ADMIN_LINKS"})
+        values, changed = self.apply.call_args[0]
+        self.assertEqual(changed, {"ADMIN_LINKS"})
+        self.assertIn("CDW Direct", [link["name"] for link in values["ADMIN_LINKS"]])
+        self.assertEqual(self.watcher.check(), set())  # unchanged file
+
+    def test_invalid_edits_keep_running_config(self):
+        self.write(self.source + "\nfrom datetime import datetime\nMAINTENANCE_INFO = dict(MAINTENANCE_INFO, start=datetime(2030, 1, 2), end=datetime(2030, 1, 1))\n")
+        self.assertEqual(self.watcher.check(), set())
+        self.write(self.source + "\nADMIN_LINKS = [\n")
+        self.assertEqual(self.watcher.check(), set())
+        self.write(self.source + '\nJIRA_JQL = "project = IT order by created"\n')
+        self.assertEqual(self.watcher.check(), set())
+        self.apply.assert_not_called()
+
+    def test_admin_links_change_does_not_touch_collectors(self):
+        original = app_module.ADMIN_LINKS
+        self.addCleanup(app_module.status.refresh, "admin_links")  # runs last
+        self.addCleanup(app_module.apply_config, {"ADMIN_LINKS": original}, {"ADMIN_LINKS"})
+        links = original + [{"name": "Status Wiki", "url": "https://wiki.example.com", "icon": ""}]
+        with patch.object(app_module.status, 'invalidate') as invalidate, patch('app.breaker.forget') as forget:
+            app_module.apply_config({"ADMIN_LINKS": links}, {"ADMIN_LINKS"})
+        invalidate.assert_called_once_with("admin_links")  # the toolbox only
+        forget.assert_not_called()
+        etag = app.test_client().get('/api/status/admin_links').headers['ETag']
+        app_module.status.refresh("admin_links")
+        self.assertIn(b"Status Wiki", app.test_client().get('/').data)
+        # Open screens see the new version and swap the toolbox fragment in.
+        client = app.test_client()
+        self.assertEqual(client.get('/api/status/admin_links', headers={"If-None-Match": etag}).status_code, 200)
+        self.assertIn(b"Status Wiki", client.get('/fragments/admin_links').data)
+
+    def test_watchlist_change_refetches_only_affected_mdm(self):
+        original = app_module.INVENTORY_WATCHLIST
+        self.addCleanup(app_module.apply_config, {"INVENTORY_WATCHLIST": original}, {"INVENTORY_WATCHLIST"})
+        edited = [dict(item) for item in original]
+        edited[0]["threshold"] = 9  # intune item, rules unchanged
+        edited[2] = dict(edited[2], match=dict(edited[2]["match"], model=r"air.*13"))  # jamf rule
+        with patch.object(app_module.status, 'invalidate') as invalidate, patch('app.breaker.forget') as forget:
+            app_module.apply_config({"INVENTORY_WATCHLIST": edited}, {"INVENTORY_WATCHLIST"})
+        invalidate.assert_called_once_with("inventory")
+        forget.assert_called_once_with("jamf")
+        self.assertIs(app_module.INVENTORY_WATCHLIST, edited)
+
+class TestProbes(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_healthz(self):
+        response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b"ok")
+
+    def test_readyz_waits_for_warm_up(self):
+        app_module.warmed.clear()
+        self.addCleanup(app_module.warmed.clear)
+        with patch.object(app_module.status, 'pending', return_value=["inventory"]):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()["pending"], ["inventory"])
+
+        app_module.warmed.set()
+        self.assertEqual(self.client.get('/readyz').status_code, 200)
+
+class TestAssets(unittest.TestCase):
+
+    LOGO = "https://cdn.worldvectorlogo.com/logos/atlassian.svg"
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dist = os.path.join(tmp.name, "dist")
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg">' + b'<path d="M0 0h24v24H0z"/>' * 40 + b'</svg>'
+
+        def fake_fetch(url, timeout=10):
+            if url != self.LOGO: raise ConnectionError("offline")
+            return svg, ".svg"
+
+        with patch('build_assets.DIST', self.dist), patch('build_assets.shutil.which', return_value=None), \
+                patch('build_assets.fetch_image', side_effect=fake_fetch):
+            self.manifest = build_assets.build()
+        self.assets = assets.Assets(self.dist)
+
+    def test_build_hashes_and_compresses(self):
+        self.assertNotIn("app.css", self.manifest)  # no Tailwind CLI here: the page keeps the CDN
+        self.assertRegex(self.manifest["dashboard.js"], r"^dashboard\.[0-9a-f]{10}\.js$")
+        self.assertRegex(self.manifest[self.LOGO], r"^img/cdn-worldvectorlogo-com-atlassian\.[0-9a-f]{10}\.svg$")
+        self.assertTrue(os.path.exists(os.path.join(self.dist, self.manifest["dashboard.js"] + ".gz")))
+        # Unreachable icons keep their remote URL.
+        icon = app_module.ADMIN_LINKS[0]["icon"]
+        self.assertEqual(self.assets.url(icon), icon)
+        self.assertEqual(self.assets.url(self.LOGO), "/assets/" + self.manifest[self.LOGO])
+        self.assertEqual(self.assets.url("app.css"), "/static/src/app.css")
+
+    def test_asset_route_serves_immutable_compressed_variant(self):
+        client = app.test_client()
+        name = self.manifest["dashboard.js"]
+        with patch('app.assets', self.assets):
+            resp = client.get(f'/assets/{name}', headers={"Accept-Encoding": "gzip"})
+            plain = client.get(f'/assets/{name}', headers={"Accept-Encoding": "gzip;q=0"})
+            missing = client.get('/assets/manifest.json')
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertEqual(resp.headers["Cache-Control"], assets.IMMUTABLE)
+        self.assertIn("javascript", resp.mimetype)
+        self.assertEqual(gzip.decompress(resp.data), plain.data)
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertEqual(missing.status_code, 404)  # only manifest entries are served
+        resp.close(); plain.close()
+
+class TestRenderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+        status._publish("services", [{"name": "GitHub", "status": "Operational", "class": "good", "logo": "", "url": "", "feed": [], "tag": "Global"}])
+
+    def test_repeat_view_served_from_cache(self):
+        first = self.app.get('/')
+        with patch('app.render_template') as mock_render:
+            second = self.app.get('/')
+        mock_render.assert_not_called()
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(self.app.get('/', headers={"If-None-Match": second.headers['ETag']}).status_code, 304)
+
+    def test_only_changed_fragment_rerenders(self):
+        self.app.get('/')
+        status._publish("services", [{"name": "GitHub", "status": "Major Outage", "class": "critical", "logo": "", "url": "", "feed": [], "tag": "Global"}])
+        rendered = []
+        real = app_module.render_template
+        def spy(name, **ctx):
+            rendered.append(name)
+            return real(name, **ctx)
+        with patch('app.render_template', side_effect=spy):
+            html = self.app.get('/').data.decode()
+        self.assertIn("Major Outage", html)
+        self.assertEqual(sorted(rendered), ['index.html', 'partials/services.html'])
+
+    def test_fragment_endpoint_serves_the_page_partial(self):
+        resp = self.app.get('/fragments/services')
+        self.assertIn('data-key="GitHub"', resp.get_data(as_text=True))
+        self.assertIn(resp.get_data(as_text=True), self.app.get('/').get_data(as_text=True))
+        self.assertEqual(self.app.get('/fragments/services', headers={"If-None-Match": resp.headers['ETag']}).status_code, 304)
+        self.assertEqual(self.app.get('/fragments/on_call').status_code, 404)
+
+        gz = self.app.get('/fragments/services', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual((gz.headers['Content-Encoding'], gz.headers['Vary']), ("gzip", "Accept-Encoding"))
+        self.assertEqual(gzip.decompress(gz.data), resp.data)
+        self.assertNotEqual(gz.headers['ETag'], resp.headers['ETag'])
+
+    def test_gzip_variant(self):
+        resp = self.app.get('/', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers['Content-Encoding'], "gzip")
+        self.assertIn(b"IT SERVICES", gzip.decompress(resp.data))
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        breaker._upstreams.clear()
+
+    def test_opens_after_threshold_and_half_opens_after_backoff(self):
+        cb = breaker.CircuitBreaker(threshold=2, base=10)
+        cb.failure()
+        self.assertTrue(cb.allow())
+        cb.failure()
+        self.assertEqual(cb.state, breaker.OPEN)
+        self.assertFalse(cb.allow())
+
+        cb.retry_at = 0
+        self.assertTrue(cb.allow())        # single half-open trial
+        self.assertFalse(cb.allow())
+        cb.failure()
+        self.assertEqual((cb.state, cb.trips), (breaker.OPEN, 2))
+        cb.retry_at = 0
+        cb.allow()
+        cb.success()
+        self.assertEqual(cb.state, breaker.CLOSED)
+
+    def test_cancelled_job_is_ignored(self):
+        from concurrent.futures import Future
+        state, future = breaker.upstream("github"), Future()
+        future.cancel()
+        breaker.record_outcome(state, future)
+        self.assertEqual((state.breaker.state, state.has_value), (breaker.CLOSED, False))
+
+    def test_open_breaker_serves_last_value_as_stale(self):
+        state = breaker.upstream("github")
+        state.record_success({"name": "GitHub", "class": "good"})
+        state.next_due = 0
+        for _ in range(breaker.FAILURE_THRESHOLD):
+            state.breaker.failure()
+
+        fn = MagicMock()
+        self.assertEqual(state.call(fn), {"name": "GitHub", "class": "good", "stale": True})
+        fn.assert_not_called()
+
+    def test_cold_inventory_failure_is_unknown_not_out_of_stock(self):
+        with patch('app.USE_JAMF', True), patch('app.count_jamf', side_effect=ConnectionError("down")):
+            items = {i['name']: i for i in app_module.get_inventory()}
+        jamf = [i['name'] for i in app_module.INVENTORY_WATCHLIST if (i.get('match') or {}).get('source') == "jamf"]
+        self.assertTrue(jamf)
+        for name in jamf:
+            self.assertEqual((items[name]['count'], items[name]['class'], items[name]['stale']), (None, "unknown", True))
+        with app.app_context():
+            html = app_module.render_template('partials/inventory.html', inventory=[items[jamf[0]]])
+        self.assertIn("NO DATA", html)
+        self.assertNotIn("OUT OF STOCK", html)
+
+    def test_cadence_follows_incidents(self):
+        state = breaker.upstream("aws:ec2")
+        state.record_success({"class": "critical"})
+        self.assertEqual(state.interval(), breaker.POLL_FAST)
+        state.record_success({"class": "good"})
+        self.assertEqual(state.interval(), breaker.POLL_NORMAL)
+        state.healthy_since -= breaker.QUIET_AFTER
+        self.assertEqual(state.interval(), breaker.POLL_SLOW)
+
+    @patch('providers.fetch', side_effect=RuntimeError("events down"))
+    @patch('providers.fetch_feed')
+    @patch('providers.fetch_json', return_value={"components": [], "incidents": []})
+    def test_failed_tile_keeps_last_value(self, mock_json, mock_feed, mock_aws):
+        def feed(url, timeout=5):
+            if "aws" in url: raise RuntimeError("feed down")
+            return MagicMock(entries=[])
+
+        mock_feed.side_effect = feed
+        ec2 = breaker.upstream("AWS EC2")
+        ec2.record_success({"class": "warning", "status": "Service Issue", "tags": [], "feed": []})
+        ec2.next_due = 0
+        tiles = {t['name']: t for t in get_health_data()}
+        self.assertEqual(tiles["AWS EC2"]['status'], "Service Issue")
+        self.assertTrue(tiles["AWS EC2"]['stale'])
+        self.assertEqual(tiles["AWS S3"]['class'], "unknown")
+
+class TestProviders(unittest.TestCase):
+
+    def setUp(self):
+        breaker._upstreams.clear()
+
+    @patch('providers.fetch_json')
+    def test_statuspage_sources_fold_into_one_tile(self, mock_json):
+        pages = {
+            "https://a.test/summary.json": {"incidents": [{"name": "Slow search", "impact": "minor", "created_at": "2024-01-01T10:05:00Z"}]},
+            "https://b.test/summary.json": {"incidents": []},
+        }
+        mock_json.side_effect = lambda url, timeout=5: pages[url]
+        provider = providers.Provider({"name": "Vendor", "sources": [
+            {"name": "Alpha", "url": "https://a.test/summary.json"},
+            {"name": "Beta", "url": "https://b.test/summary.json"},
+        ]})
+        tile = provider.tile([(s, provider.collect(s), True) for s in provider.sources])
+        self.assertEqual((tile['class'], tile['status']), ("warning", "Active Incident"))
+        self.assertEqual(tile['tag'], ["ALPHA"])
+        self.assertEqual(tile['feed'], [{"time": "10:05", "text": "[ALPHA] Slow search"}])
+
+    @patch('providers.fetch_json')
+    def test_component_watchlist(self, mock_json):
+        mock_json.return_value = {"components": [
+            {"name": "Actions", "status": "major_outage"},
+            {"name": "Unwatched", "status": "major_outage"},
+        ]}
+        provider = providers.Provider({"name": "GitHub", "url": "https://gh.test", "components": ["Actions"]})
+        tile = provider.tile([(provider.sources[0], provider.collect(provider.sources[0]), True)])
+        self.assertEqual((tile['class'], tile['tag']), ("critical", ["Actions"]))
+
+    @patch('providers.fetch_json')
+    def test_watchlist_ignores_incidents_on_other_components(self, mock_json):
+        provider = providers.Provider({"name": "GitHub", "url": "https://gh.test", "components": ["Actions"]})
+        incident = {"name": "Slow Codespaces", "impact": "minor", "created_at": "2024-01-01T10:05:00Z",
+                    "components": [{"name": "Codespaces"}]}
+        mock_json.return_value = {"components": [], "incidents": [incident]}
+        result = provider.collect(provider.sources[0])
+        self.assertEqual(result['class'], "good")
+        self.assertEqual(result['feed'][0]['text'], "Slow Codespaces")  # still listed
+
+        incident["components"].append({"name": "Actions"})
+        self.assertEqual(provider.collect(provider.sources[0])['class'], "warning")
+
+    def _aws(self, regions):
+        return providers.Provider({"name": "AWS EC2", "adapter": "aws_health", "url": "https://health.test/currentevents",
+                                   "service": "ec2", "regions": regions})
+
+    def test_aws_events_indexed_by_service_and_region(self):
+        events = [
+            {"service": "ec2-us-west-2", "status": "3", "summary": "Instance launch failures", "date": "1704103200"},
+            {"service": "ec2-us-east-1", "status": "1", "summary": "[RESOLVED] API latency", "date": "1704103200"},
+            {"service": "iam", "status": "2", "summary": "Sign-in delays"},
+        ]
+        resp = MagicMock(content=json.dumps(events).encode("utf-16"))
+        index = providers.parse_aws_events(resp)
+        self.assertEqual(set(index), {("ec2", "us-west-2"), ("ec2", "us-east-1"), ("iam", "global")})
+
+        with patch('providers.fetch', side_effect=lambda url, parse, timeout: index):
+            provider = self._aws(["us-east-1", "us-west-2"])
+            result = provider.collect(provider.sources[0])
+        self.assertEqual((result['class'], result['tags']), ("critical", ["US-WEST-2"]))
+        self.assertEqual(len(result['feed']), 2)
+
+    @patch('providers.fetch_feed', return_value=feeds.Feed([feeds.FeedEntry("Increased error rates", None, None, None)]))
+    @patch('providers.fetch', side_effect=RuntimeError("403"))
+    def test_aws_falls_back_to_rss(self, mock_fetch, mock_feed):
+        provider = self._aws(["us-east-1"])
+        result = provider.collect(provider.sources[0])
+        self.assertEqual(result['class'], "warning")
+        mock_feed.assert_called_once_with("https://status.aws.amazon.com/rss/ec2-us-east-1.rss", timeout=5)
+
+    def test_custom_adapter_and_validation(self):
+        provider = providers.Provider({"name": "Internal", "adapter": "custom", "url": "https://int.test",
+                                       "collect": "providers:fragment"})
+        self.assertEqual(provider.tile([(provider.sources[0], None, False)])['class'], "unknown")
+        with self.assertRaises(ValueError):
+            providers.load_providers([{"name": "X", "adapter": "nope", "url": "https://x.test"}])
+        with self.assertRaises(ValueError):
+            providers.load_providers([{"name": "X", "url": "https://x.test"}] * 2)
+
+    def test_provider_interval_sets_cadence(self):
+        state = breaker.upstream("slow-vendor", 600)
+        state.record_success({"class": "good"})
+        self.assertEqual(state.interval(), 600)
+        state.record_success({"class": "critical"})
+        self.assertEqual(state.interval(), breaker.POLL_FAST)
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.store = history.HistoryStore(":memory:")
+        self.t0 = 1_700_000_000 - 1_700_000_000 % history.DAY
+
+    def test_only_transitions_are_written(self):
+        self.assertTrue(self.store.record("Azure", "good", ts=self.t0))
+        self.assertFalse(self.store.record("Azure", "good", ts=self.t0 + 60))
+        self.assertTrue(self.store.record("Azure", "warning", "inc-1", ts=self.t0 + 120))
+        self.assertEqual([t['class'] for t in self.store.transitions("Azure")], ["warning", "good"])
+
+    def test_uptime_from_rollups_matches_raw(self):
+        t0, hour = self.t0, history.HOUR
+        self.store.record("Azure", "good", ts=t0)
+        self.store.record("Azure", "critical", ts=t0 + 2 * hour)
+        self.store.record("Azure", "good", ts=t0 + 3 * hour)
+        now = t0 + 4 * hour
+        raw = self.store.uptime("Azure", 4 * hour, now)
+        self.store.rollup(now)
+        self.assertEqual(len(self.store.series("Azure", history.HOUR, 24, now)), 4)
+        self.assertEqual(self.store.uptime("Azure", 4 * hour, now), raw)
+        self.assertEqual((raw['uptime'], raw['critical']), (75.0, 25.0))
+
+        self.store.rollup(t0 + history.DAY + hour)
+        daily = self.store.series("Azure", history.DAY, 30, t0 + history.DAY + hour)
+        self.assertEqual(daily[0]['critical'], hour)
+
+    def test_compaction_keeps_last_state(self):
+        t0 = self.t0
+        self.store.record("GitHub", "warning", ts=t0)
+        self.store.record("GitHub", "good", ts=t0 + 60)
+        now = t0 + history.RAW_RETENTION + history.DAY
+        self.store.compact(now)
+        self.assertEqual([t['class'] for t in self.store.transitions("GitHub")], ["good"])
+        self.assertEqual(self.store.uptime("GitHub", history.DAY, now)['uptime'], 100.0)
+
+    def test_failed_rollup_rolls_back(self):
+        self.store.record("Azure", "good", ts=self.t0)
+        with patch.object(self.store, "_set_meta", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.store.rollup(self.t0 + 2 * history.HOUR)
+        self.assertFalse(self.store._conn.in_transaction)
+        self.assertTrue(self.store.record("Azure", "critical", ts=self.t0 + 3 * history.HOUR))
+        self.assertEqual(self.store.series("Azure", history.HOUR, 24, self.t0 + 4 * history.HOUR), [])
+
+    def test_incident_is_truncated(self):
+        long = "x" * (history.INCIDENT_MAX * 5)
+        self.assertTrue(self.store.record("Azure", "warning", long, ts=self.t0))
+        self.assertFalse(self.store.record("Azure", "warning", long, ts=self.t0 + 60))
+        self.assertEqual(len(self.store.transitions("Azure")[0]['incident']), history.INCIDENT_MAX)
+
+    def test_history_api(self):
+        client = app.test_client()
+        status._publish("services", [{"name": "GitHub", "class": "critical", "incident": "abc"}])
+        status.refresh("history")
+        self.assertEqual(client.get('/api/history').get_json()['GitHub']['current'], "critical")
+        body = client.get('/api/history/GitHub').get_json()
+        self.assertEqual(body['transitions'][0]['incident'], "abc")
+        self.assertEqual(client.get('/api/history/Nope').status_code, 404)
+
+class TestEvents(unittest.TestCase):
+
+    def test_diff_reports_only_transitions(self):
+        old = [{"name": "GitHub", "class": "good", "status": "Operational", "feed": []},
+               {"name": "AWS S3", "class": "good", "status": "Operational", "feed": []}]
+        new = [{"name": "GitHub", "class": "critical", "status": "Major Outage", "feed": []},
+               {"name": "AWS S3", "class": "good", "status": "Operational", "feed": [{"time": "10:00", "text": "Informational"}]}]
+        kinds = {(e, d['name']) for e, d in diff_section("services", old, new)}
+        self.assertEqual(kinds, {("tile", "GitHub"), ("feed", "AWS S3")})
+        self.assertEqual(diff_section("services", new, new), [])
+
+        inv = diff_section("inventory", [{"name": "Mac", "count": 3, "class": "warning"}],
+                           [{"name": "Mac", "count": 0, "class": "critical"}])
+        self.assertEqual(inv[0][0], "inventory")
+
+    def test_resume_from_last_event_id(self):
+        bus = EventBus(backlog=3)
+        first = bus.publish("tile", {"name": "a"})
+        second = bus.publish("tile", {"name": "b"})
+        self.assertEqual([e[0] for e in bus.since(first)], [second])
+
+        frames = list(stream(bus, first, heartbeat=0.01, max_age=0.05))
+        self.assertTrue(any(f.startswith(f"id: {second}\n") for f in frames))
+
+    def test_evicted_history_forces_resync(self):
+        bus = EventBus(backlog=2)
+        start = bus.last_id
+        for i in range(4):
+            bus.publish("tile", {"name": str(i)})
+        self.assertIsNone(bus.since(start))
+        frames = list(stream(bus, start, heartbeat=0.01, max_age=0.02))
+        self.assertTrue(any("event: resync" in f for f in frames))
+        self.assertEqual(bus.clients, 0)
+
+class TestStatusApi(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+
+    def test_status_json_and_304(self):
+        first = self.app.get('/api/status')
+        self.assertEqual(first.status_code, 200)
+        body = first.get_json()
+        self.assertIn("services", body['sections'])
+        self.assertIn("version", body['sections']['inventory'])
+
+        etag = first.headers['ETag']
+        again = self.app.get('/api/status', headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b"")
+
+    def test_unchanged_refresh_keeps_etag(self):
+        status._publish("tickets", [{"id": "INC-2"}])
+        etag = self.app.get('/api/status').headers['ETag']
+        section = status.snapshot().sections["tickets"]
+        status._publish("tickets", [{"id": "INC-2"}])  # re-fetched, same data
+        self.assertEqual(self.app.get('/api/status', headers={"If-None-Match": etag}).status_code, 304)
+        self.assertEqual(status.snapshot().sections["tickets"].version, section.version)
+        self.assertGreaterEqual(status.snapshot().sections["tickets"].updated, section.updated)
+
+    def test_section_subresource(self):
+        resp = self.app.get('/api/status/on_call')
+        self.assertEqual(resp.get_json()['data']['name'], "Alex Mercer")
+        self.assertEqual(self.app.get('/api/status/nope').status_code, 404)
+
+    def test_new_version_changes_etag(self):
+        etag = self.app.get('/api/status/tickets').headers['ETag']
+        status._publish("tickets", [{"id": "INC-1"}])
+        resp = self.app.get('/api/status/tickets', headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['data'], [{"id": "INC-1"}])
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_exposition(self):
+        hist = metrics.Histogram("test_latency_seconds", "Test.", ["host"], buckets=(0.1, 1))
+        metrics.REGISTRY.remove(hist)
+        hist.observe(0.05, host="a")
+        hist.observe(0.5, host="a")
+        lines = hist.render()
+        self.assertIn('test_latency_seconds_bucket{host="a",le="0.1"} 1', lines)
+        self.assertIn('test_latency_seconds_bucket{host="a",le="1"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{host="a",le="+Inf"} 2', lines)
+        self.assertIn('test_latency_seconds_count{host="a"} 2', lines)
+
+    def test_fetch_layer_counts_cache_results(self):
+        fetch._entries.clear()
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, headers={})
+        before = dict(metrics.FETCH_CACHE._values)
+        with patch('fetch.session_for', return_value=session):
+            fetch.begin_cycle()
+            fetch.fetch_json("https://example.test/metrics.json")
+            fetch.fetch_json("https://example.test/metrics.json")
+        for result in ("miss", "hit"):
+            self.assertEqual(metrics.FETCH_CACHE._values[(result,)] - before.get((result,), 0), 1)
+
+    def test_metrics_endpoint(self):
+        client = app.test_client()
+        client.get('/')
+        body = client.get('/metrics').get_data(as_text=True)
+        self.assertIn('snapshot_age_seconds{section="on_call"}', body)
+        self.assertIn('render_cache_total{cache="page",result=', body)
+        self.assertIn('index_render_seconds_count', body)
+        self.assertIn('http_requests_in_flight 1', body)
+
+class TestCli(unittest.TestCase):
+
+    def tile(self, name, cls="good", status="Operational"):
+        return {"name": name, "class": cls, "status": status, "logo": "", "url": "", "feed": [], "tag": "Global"}
+
+    @patch('main.collect_tiles')
+    def test_once_json_and_exit_code(self, mock_collect):
+        mock_collect.return_value = [self.tile("GitHub"), self.tile("AWS S3", "critical", "Service Disruption")]
+        out = io.StringIO()
+        code = main.run(main.parse_args(["--once", "--json"]), out)
+
+        self.assertEqual(code, 2)
+        services = json.loads(out.getvalue())["services"]
+        self.assertEqual([s["name"] for s in services], ["GitHub", "AWS S3"])
+        self.assertEqual(services[1]["status"], "Service Disruption")
+        self.assertNotIn("logo", services[0])
+
+    @patch('main.time.sleep', side_effect=[None, KeyboardInterrupt])
+    @patch('main.collect_tiles')
+    def test_ndjson_streams_only_changes(self, mock_collect, _):
+        mock_collect.side_effect = [
+            [self.tile("GitHub"), self.tile("Atlassian")],
+            [self.tile("GitHub", "warning", "Active Incident"), self.tile("Atlassian")],
+        ]
+        out = io.StringIO()
+        with self.assertRaises(KeyboardInterrupt):
+            main.run(main.parse_args(["--json"]), out)
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(l["name"], l["class"]) for l in lines], [("GitHub", "good"), ("Atlassian", "good"), ("GitHub", "warning")])
+
+    def test_screen_rewrites_changed_lines_only(self):
+        out = io.StringIO()
+        screen = main.Screen(out)
+        screen.draw(["header", "GitHub ok", "S3 ok"])
+        out.seek(0); out.truncate()
+        screen.draw(["header", "GitHub ok", "S3 down"])
+        self.assertEqual(out.getvalue(), "\x1b[3;1H\x1b[2KS3 down\x1b[4;1H")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Expiry-aware cache for OAuth / bearer tokens (Jamf Pro, Microsoft Graph).
+
+A token is reused until shortly before the expiry its provider returned.
+Inside the REFRESH_AHEAD window it is still handed out while one background
+thread renews it, and concurrent callers that find no valid token all wait on
+the same in-flight request instead of each asking the identity endpoint.
+"""
+import threading
+import time
+from datetime import datetime
+
+from fetch import session_for
+
+# Treat a token as expired this many seconds early (clock skew, slow calls).
+EXPIRY_SKEW = 30
+# Start a background renewal this many seconds before expiry.
+REFRESH_AHEAD = 300
+# Lifetime assumed when a provider omits or garbles its expiry.
+DEFAULT_LIFETIME = 1200
+
+
+def expires_in(seconds):
+    """Absolute expiry for an OAuth 'expires_in' value."""
+    try:
+        return time.time() + int(seconds)
+    except (TypeError, ValueError):
+        return time.time() + DEFAULT_LIFETIME
+
+
+def expires_at(timestamp):
+    """Absolute expiry for an ISO-8601 'expires' value (Jamf Pro)."""
+    try:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return time.time() + DEFAULT_LIFETIME
+
+
+class TokenCache:
+    """
+    Holds one credential. `fetcher()` must return (token, expiry_epoch)
+    and raise on failure.
+    """
+
+    def __init__(self, name, fetcher):
+        self.name = name
+        self.fetcher = fetcher
+        self._token = None
+        self._expiry = 0.0
+        self._lock = threading.Lock()
+        self._renewing = False
+
+    def get(self):
+        """Returns a valid token, fetching one only when none is usable."""
+        now = time.time()
+        token, expiry = self._token, self._expiry
+        if token and now < expiry - EXPIRY_SKEW:
+            if now >= expiry - REFRESH_AHEAD:
+                self._renew_in_background()
+            return token
+
+        with self._lock:
+            # Another caller may have refreshed while we waited for the lock.
+            if self._token and time.time() < self._expiry - EXPIRY_SKEW:
+                return self._token
+            return self._refresh()
+
+    def invalidate(self, token):
+        """Drops a token the provider rejected (e.g. on 401)."""
+        with self._lock:
+            if self._token == token:
+                self._token, self._expiry = None, 0.0
+
+    def _refresh(self):
+        # Caller holds self._lock.
+        self._token, self._expiry = self.fetcher()
+        return self._token
+
+    def _renew_in_background(self):
+        with self._lock:
+            if self._renewing:
+                return
+            self._renewing = True
+
+        def renew():
+            try:
+                with self._lock:
+                    self._refresh()
+            except Exception as e:
+                print(f"Token Error ({self.name}): {e}")
+            finally:
+                self._renewing = False
+
+        threading.Thread(target=renew, name=f"token-{self.name}", daemon=True).start()
+
+
+def authorized_get(cache, url, headers=None, **kwargs):
+    """
+    GETs an URL with the cached bearer token. A 401 invalidates the token
+    and the request is retried once with a fresh one.
+    """
+    for attempt in range(2):
+        token = cache.get()
+        resp = session_for(url).get(url, headers={**(headers or {}), "Authorization": f"Bearer {token}"}, **kwargs)
+        if resp.status_code != 401 or attempt:
+            return resp
+        cache.invalidate(token)